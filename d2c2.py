@@ -5,8 +5,10 @@ import logging
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+import d2c2_cli
+
+# Configure logging; forced, since importing d2c2_cli already configured it for the CLI
+logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s', force=True)
 
 # Utility Functions
 
@@ -74,7 +76,59 @@ removes digits#######################also uses unsndersocres?
     
     return base + ext
 
-def write_md_file(path, content, lines, front_matter=None):
+# Output Writers
+
+class DiskWriter(d2c2_cli.DiskWriter):
+    """
+    The CLI's DiskWriter, plus exists() for the GUI's collision handling.
+
+    make_dir() also creates missing parents, since write_md_file() asks for the
+    folder of every file and the base directory may not exist yet.
+    """
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def make_dir(self, path):
+        if os.path.isdir(path):
+            return False
+        os.makedirs(path, exist_ok=True)
+        return True
+
+class MemoryWriter(d2c2_cli.MemoryWriter):
+    """
+    The CLI's MemoryWriter, for previews that should not touch the disk.
+
+    create_structure() builds paths by joining names and asks for the same folder
+    more than once, so names are normalized first, make_dir() is idempotent and
+    creates parents like os.makedirs, and exists() answers from what was written.
+    """
+
+    def __init__(self, base_dir=os.curdir):
+        super().__init__(base_dir)
+        if os.path.normpath(base_dir) == os.curdir:
+            self.cut = 0  # Normalized paths below the current directory have no prefix
+        self.known_directories = set()
+
+    def name(self, path):
+        path = os.path.normpath(path)
+        return '' if path == os.curdir else path[self.cut:].replace(os.sep, '/')
+
+    def exists(self, path):
+        name = self.name(path)
+        return not name or name in self.known_directories or name in self.files
+
+    def make_dir(self, path):
+        name = self.name(path)
+        if not name or name in self.known_directories:
+            return False
+        self.make_dir(os.path.dirname(os.path.normpath(path)))  # Parents first, as os.makedirs would
+        self.known_directories.add(name)
+        return super().make_dir(path)
+
+DISK_WRITER = DiskWriter()
+
+def write_md_file(path, content, lines, front_matter=None, writer=DISK_WRITER):
     """
     Writes content and front matter to a Markdown file.
 
@@ -83,24 +137,22 @@ def write_md_file(path, content, lines, front_matter=None):
         content (str): The main content to write.
         lines (list): Additional content lines to write.
         front_matter (str, optional): The front matter to include at the top of the file.
+        writer (d2c2_cli.OutputWriter, optional): Where to write the file.
     """
-    os.makedirs(os.path.dirname(path), exist_ok=True)  # Ensure parent directories exist
-    with open(path, 'w', encoding='utf-8') as md_file:
-        # Write the front matter if provided
-        if front_matter:
-            #md_file.write('---\n')  # Start of front matter
-            md_file.write(front_matter)  # Write the front matter content
-            #md_file.write('---\n\n')  # End of front matter and add a blank line
-
-        # Write the main content
-        md_file.write(content + '\n')
-
-        # Write additional content lines
-        for line in lines:
-            # Remove '**' markers from the line
-            cleaned_line = line.replace('**', '')
-            # Write the cleaned line to the file
-            md_file.write(cleaned_line + '\n')
+    writer.make_dir(os.path.dirname(path))  # Ensure parent directories exist
+    parts = []
+    # Write the front matter if provided
+    if front_matter:
+        parts.append(front_matter)
+
+    # Write the main content
+    parts.append(content + '\n')
+
+    # Write additional content lines, without their '**' markers
+    for line in lines:
+        parts.append(line.replace('**', '') + '\n')
+
+    writer.write_file(path, ''.join(parts))
 
 def categorize_lines(list_content):
     """
@@ -157,7 +209,7 @@ def categorize_lines(list_content):
     return root
 
 # Structure Creation Function
-def create_structure(node, parent_path, id_to_path_map, sanitize_function, allow_empty_folders):
+def create_structure(node, parent_path, id_to_path_map, sanitize_function, allow_empty_folders, writer=DISK_WRITER):
     """
     Recursively creates directories and Markdown files based on the hierarchical structure.
 
@@ -167,6 +219,7 @@ def create_structure(node, parent_path, id_to_path_map, sanitize_function, allow
         id_to_path_map (dict): A mapping from unique IDs to paths.
         sanitize_function (function): The function to use for sanitizing names.
         allow_empty_folders (bool): Whether to allow empty folders.
+        writer (d2c2_cli.OutputWriter, optional): Where to create the structure.
     """
     for child in node.get('Children', []):
         content = child['Content']
@@ -183,7 +236,7 @@ def create_structure(node, parent_path, id_to_path_map, sanitize_function, allow
             raise ValueError(f"Invalid path detected: {normalized_current_path} is not within {normalized_parent_path}")
 
         # Handle name conflicts by appending a unique identifier
-        if os.path.exists(normalized_current_path):
+        if writer.exists(normalized_current_path):
             sanitized_name += '_' + child['UniqueID'][:6]
             normalized_current_path = os.path.join(normalized_parent_path, sanitized_name)
 
@@ -196,25 +249,26 @@ def create_structure(node, parent_path, id_to_path_map, sanitize_function, allow
 
         if child['Children']:
             # Create a directory for nodes with children
-            os.makedirs(normalized_current_path, exist_ok=True)
+            writer.make_dir(normalized_current_path)
             # Create an index.md file for the directory
             md_file_path = os.path.join(normalized_current_path, 'index.md')
-            write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter)
+            write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter, writer)
             # Recursively create structure for child nodes
-            create_structure(child, normalized_current_path, id_to_path_map, sanitize_function, allow_empty_folders)
+            create_structure(child, normalized_current_path, id_to_path_map, sanitize_function, allow_empty_folders,
+                             writer)
         elif allow_empty_folders:
             # Check if any siblings have children
             siblings_have_children = any(sibling['Children'] for sibling in node['Children'] if sibling != child)
 
             if siblings_have_children:
                 # Create a directory with index.md if any siblings have children
-                os.makedirs(normalized_current_path, exist_ok=True)
+                writer.make_dir(normalized_current_path)
                 md_file_path = os.path.join(normalized_current_path, 'index.md')
-                write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter)
+                write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter, writer)
         else:
                 # Create a .md file if no siblings have children
                 md_file_path = f"{normalized_current_path}.md"
-                write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter)
+                write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter, writer)
 
 class ProcessingApp:
     def __init__(self, root):
@@ -245,6 +299,10 @@ class ProcessingApp:
         self.run_button = tk.Button(self.root, text="Run Processing", command=self.run_processing)
         self.run_button.pack(pady=20)
 
+        # Preview Button
+        self.preview_button = tk.Button(self.root, text="Preview (Nothing Written)", command=self.preview_processing)
+        self.preview_button.pack(pady=5)
+
         # Delete Contents Button
         self.delete_button = tk.Button(self.root, text="Delete Contents of Base Directory", command=self.delete_base_directory_contents)
         self.delete_button.pack(pady=5)
@@ -280,6 +338,38 @@ class ProcessingApp:
 
         self.execute_processing(self.base_dir, self.input_file)
 
+    def get_sanitize_function(self):
+        # Select the sanitization function based on the checkbox state
+        if self.use_alternative_sanitization.get():
+            return alternative_sanitize_and_clean_name
+        return sanitize_and_clean_name
+
+    def preview_processing(self):
+        if not hasattr(self, 'input_file') or not self.input_file:
+            messagebox.showerror("Error", "Please select an input Markdown file.")
+            return
+
+        try:
+            with open(self.input_file, 'r', encoding='utf-8') as f:
+                root = categorize_lines(line.rstrip() for line in f)
+
+            # Build the whole structure in memory, as a run into an empty base directory would
+            base_dir = 'docs'
+            writer = MemoryWriter(base_dir)
+            create_structure(root, base_dir, {'root': base_dir}, self.get_sanitize_function(),
+                             self.allow_empty_folders.get(), writer)
+
+            folders = [name + '/' for name in writer.directories]
+            entries = sorted(folders + list(writer.files))
+            shown = entries[:1000]
+            if len(entries) > len(shown):
+                shown.append(f"... and {len(entries) - len(shown)} more")
+            self.log(f"Preview: {len(folders)} folders and {len(writer.files)} files would be created")
+            self.log('\n'.join(shown))
+
+        except Exception as e:
+            self.log(f"An error occurred during the preview:\n{str(e)}")
+
     def delete_base_directory_contents(self):
         if not hasattr(self, 'base_dir') or not self.base_dir:
             messagebox.showerror("Error", "Please select a base directory.")
@@ -313,21 +403,18 @@ class ProcessingApp:
             file_handler.setFormatter(formatter)
             logging.getLogger().addHandler(file_handler)
 
-            # Read the input file content directly
+            # Build the hierarchy tree straight from the file, without a copy of its lines.
+            # The GUI keeps the whole tree on purpose: create_structure resolves name clashes
+            # by checking what already exists, in tree order, and with Allow Empty Folders a
+            # leaf depends on siblings that come after it. A streaming pass would reorder
+            # those checks and change the GUI's output; d2c2_cli.py is the streaming path.
             with open(input_file, 'r', encoding='utf-8') as f:
-                list_content = [line.rstrip() for line in f]
-
-            # Build the hierarchy tree
-            root = categorize_lines(list_content)
+                root = categorize_lines(line.rstrip() for line in f)
 
             # Mapping from unique IDs to filesystem paths
             id_to_path_map = {'root': base_dir}
 
-            # Select the sanitization function based on the checkbox state
-            if self.use_alternative_sanitization.get():
-                sanitize_function = alternative_sanitize_and_clean_name
-            else:
-                sanitize_function = sanitize_and_clean_name
+            sanitize_function = self.get_sanitize_function()
 
             # Create the folder structure and .md files using the selected sanitization function
             create_structure(root, base_dir, id_to_path_map, sanitize_function, self.allow_empty_folders.get())
@@ -0,0 +1,290 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+
+import d2c2_cli
+
+# Benchmarks for the outline parser, path planner and writer.
+#
+#   python d2c2_bench.py --nodes 100000 --output results.json
+#   python d2c2_bench.py --compare before.json after.json
+
+PHASES = ('parse', 'plan', 'write', 'total')
+
+# Names shared between siblings to produce sanitized-name collisions
+COMMON_NAMES = ['Overview', 'Examples', 'Getting Started', 'Reference', 'FAQ', '1. Introduction',
+                'Setup (advanced)', 'Notes...', 'API/CLI', 'Troubleshooting']
+
+def generate_outline(nodes, depth=4, fanout=5, body_ratio=0.2, collision_rate=0.1, seed=0):
+    """
+    Generates a synthetic outline.
+
+    Top-level sections repeat until the node budget is used up; below the top
+    level every node has up to fanout children, down to the given depth.
+
+    Args:
+        nodes (int): Number of outline entries (body lines not included).
+        depth (int): Maximum nesting depth.
+        fanout (int): Children per node below the top level.
+        body_ratio (float): Probability that an entry is followed by a bold body line.
+        collision_rate (float): Probability that an entry reuses a common name.
+        seed (int): Random seed; the same parameters always give the same outline.
+
+    Returns:
+        list: The outline lines.
+    """
+    rng = random.Random(seed)
+    lines = ['title: Benchmark outline']
+    count = 0
+
+    def add_entry(level):
+        nonlocal count
+        if rng.random() < collision_rate:
+            name = rng.choice(COMMON_NAMES)
+        else:
+            name = f"Topic {count} {rng.choice(COMMON_NAMES)}"
+        indent = '  ' * level
+        lines.append(f"{indent}- {name}")
+        count += 1
+        if rng.random() < body_ratio:
+            lines.append(f"{indent}  **Body text for entry {count}, with some words to write.**")
+
+    def add_children(level):
+        for _ in range(fanout):
+            if count >= nodes:
+                return
+            add_entry(level)
+            if level + 1 < depth:
+                add_children(level + 1)
+
+    while count < nodes:
+        add_entry(0)
+        if depth > 1:
+            add_children(1)
+
+    return lines
+
+def bench_cli(lines, out_dir, sanitize_function, allow_empty_folders, jobs, in_memory=False):
+    """
+    Times the d2c2_cli.py phases separately: build_outline, iter_path_plan, write_plan.
+    """
+    d2c2_cli.SANITIZER.cache_clear()
+    timings = {}
+
+    start = time.perf_counter()
+    root = d2c2_cli.build_outline(lines)
+    timings['parse'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    plan = list(d2c2_cli.iter_path_plan(d2c2_cli.iter_tree_events(root), out_dir, sanitize_function,
+                                        allow_empty_folders))
+    timings['plan'] = time.perf_counter() - start
+
+    writer = d2c2_cli.MemoryWriter(out_dir) if in_memory else None
+    if not in_memory:
+        os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    d2c2_cli.write_plan(plan, jobs, writer=writer)
+    timings['write'] = time.perf_counter() - start
+
+    timings['total'] = timings['parse'] + timings['plan'] + timings['write']
+    timings['files'] = sum(1 for entry in plan if entry.kind == 'file')
+    return timings
+
+def bench_cli_stream(input_file, out_dir, sanitize_function, allow_empty_folders, jobs, in_memory=False):
+    """
+    Times the streaming d2c2_cli.py path end to end; its phases interleave, so only the total is reported.
+    """
+    d2c2_cli.SANITIZER.cache_clear()
+    writer = d2c2_cli.MemoryWriter(out_dir) if in_memory else None
+    start = time.perf_counter()
+    summary = d2c2_cli.process_outline(input_file, out_dir, sanitize_function, allow_empty_folders, jobs=jobs,
+                                       writer=writer)
+    return {'total': time.perf_counter() - start, 'files': summary['written']}
+
+def bench_gui(lines, out_dir, remove_digits, allow_empty_folders, in_memory=False):
+    """
+    Times the d2c2.py code path. Its create_structure plans and writes in one pass,
+    so that time is reported as the write phase. remove_digits selects d2c2.py's own
+    alternative sanitizer, matching the CLI paths.
+    """
+    import d2c2
+    timings = {}
+
+    start = time.perf_counter()
+    root = d2c2.categorize_lines(lines)
+    timings['parse'] = time.perf_counter() - start
+
+    writer = d2c2.MemoryWriter(out_dir) if in_memory else d2c2.DISK_WRITER
+    if not in_memory:
+        os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    if remove_digits:
+        sanitize_function = d2c2.alternative_sanitize_and_clean_name
+    else:
+        sanitize_function = d2c2.sanitize_and_clean_name
+    d2c2.create_structure(root, out_dir, {'root': out_dir}, sanitize_function, allow_empty_folders, writer)
+    timings['write'] = time.perf_counter() - start
+
+    timings['total'] = timings['parse'] + timings['write']
+    if in_memory:
+        timings['files'] = len(writer.files)
+    else:
+        timings['files'] = sum(len(files) for _, _, files in os.walk(out_dir))
+    return timings
+
+def find_targets(disk_dir):
+    # The memory target writes nothing; its input file goes to the system temp folder
+    targets = {'memory': None}
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        targets['tmpfs'] = '/dev/shm'
+    targets['disk'] = disk_dir
+    return targets
+
+def git_revision():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+        return result.stdout.strip() if result.returncode == 0 else None
+    except OSError:
+        return None
+
+def run_benchmarks(args):
+    lines = generate_outline(args.nodes, args.depth, args.fanout, args.body_ratio, args.collision_rate, args.seed)
+    if args.remove_digits:
+        sanitize_function = d2c2_cli.alternative_sanitize_and_clean_name
+    else:
+        sanitize_function = d2c2_cli.sanitize_and_clean_name
+
+    paths = args.paths
+    if 'gui' in paths:
+        try:
+            import d2c2  # noqa: F401  (needs tkinter)
+        except ImportError as e:
+            logging.warning(f"Skipping the d2c2.py path: {e}")
+            paths = [path for path in paths if path != 'gui']
+
+    results = []
+    targets = find_targets(args.disk_dir)
+    for target in args.targets:
+        if target not in targets:
+            logging.warning(f"Skipping unavailable target {target}")
+            continue
+        in_memory = target == 'memory'
+        work_dir = tempfile.mkdtemp(prefix='d2c2-bench-', dir=targets[target])
+        try:
+            input_file = os.path.join(work_dir, 'outline.md')
+            with open(input_file, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+            for path in paths:
+                runs = []
+                for _ in range(args.repeat):
+                    out_dir = os.path.join(work_dir, 'out')
+                    shutil.rmtree(out_dir, ignore_errors=True)
+                    if path == 'cli':
+                        runs.append(bench_cli(lines, out_dir, sanitize_function, args.allow_empty_folders, args.jobs,
+                                              in_memory))
+                    elif path == 'cli-stream':
+                        runs.append(bench_cli_stream(input_file, out_dir, sanitize_function, args.allow_empty_folders,
+                                                     args.jobs, in_memory))
+                    else:
+                        runs.append(bench_gui(lines, out_dir, args.remove_digits, args.allow_empty_folders, in_memory))
+
+                # Report the fastest run of each phase
+                result = {'path': path, 'target': target, 'files': runs[0]['files']}
+                for phase in PHASES:
+                    if phase in runs[0]:
+                        result[phase] = min(run[phase] for run in runs)
+                results.append(result)
+                print(f"{path:10} {target:6} " + ' '.join(
+                    f"{phase}={result[phase]:.3f}s" for phase in PHASES if phase in result), file=sys.stderr)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'params': {
+                'nodes': args.nodes, 'depth': args.depth, 'fanout': args.fanout, 'body_ratio': args.body_ratio,
+                'collision_rate': args.collision_rate, 'seed': args.seed, 'jobs': args.jobs,
+                'remove_digits': args.remove_digits, 'allow_empty_folders': args.allow_empty_folders,
+                'repeat': args.repeat, 'lines': len(lines),
+            },
+        },
+        'results': results,
+    }
+
+def compare_results(old_file, new_file):
+    """
+    Prints the per-phase timings of two result files side by side.
+    """
+    with open(old_file, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_file, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    if old['meta']['params'] != new['meta']['params']:
+        print("Warning: the two runs used different parameters", file=sys.stderr)
+
+    old_results = {(r['path'], r['target']): r for r in old['results']}
+    print(f"{'path':10} {'target':6} {'phase':6} {'old':>9} {'new':>9} {'change':>8}")
+    for result in new['results']:
+        previous = old_results.get((result['path'], result['target']))
+        if previous is None:
+            continue
+        for phase in PHASES:
+            if phase in result and phase in previous:
+                change = (result[phase] / previous[phase] - 1) * 100 if previous[phase] else 0.0
+                print(f"{result['path']:10} {result['target']:6} {phase:6} "
+                      f"{previous[phase]:8.3f}s {result[phase]:8.3f}s {change:+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parsing, path planning and writing on synthetic outlines.')
+    parser.add_argument('--nodes', type=int, default=20000, help='Number of outline entries (default: 20000).')
+    parser.add_argument('--depth', type=int, default=4, help='Maximum nesting depth (default: 4).')
+    parser.add_argument('--fanout', type=int, default=5, help='Children per node below the top level (default: 5).')
+    parser.add_argument('--body-ratio', type=float, default=0.2, help='Share of entries followed by a body line.')
+    parser.add_argument('--collision-rate', type=float, default=0.1, help='Share of entries reusing a common name.')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed for the generator.')
+    parser.add_argument('--remove-digits', action='store_true', help='Use the alternative sanitizer.')
+    parser.add_argument('--allow-empty-folders', action='store_true', help='Allow the creation of empty folders.')
+    parser.add_argument('--jobs', type=int, default=1, help='File writer threads for the d2c2_cli.py paths.')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement; the fastest is kept.')
+    parser.add_argument('--paths', nargs='+', choices=['cli', 'cli-stream', 'gui'], default=['cli', 'cli-stream', 'gui'],
+                        help='Code paths to measure: d2c2_cli.py phases, d2c2_cli.py streaming, d2c2.py.')
+    parser.add_argument('--targets', nargs='+', choices=['memory', 'tmpfs', 'disk'], default=['memory', 'tmpfs', 'disk'],
+                        help='Where to write: in memory (nothing written), /dev/shm and/or --disk-dir.')
+    parser.add_argument('--disk-dir', default='.', help='Directory on disk for the disk target (default: current).')
+    parser.add_argument('--output', help='Write the JSON results to this file instead of stdout.')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='Compare two JSON result files.')
+
+    args = parser.parse_args()
+
+    if args.compare:
+        compare_results(*args.compare)
+        return
+
+    logging.getLogger().setLevel(logging.WARNING)
+    results = run_benchmarks(args)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,31 @@
 import os
 import re
+import io
+import sys
+import glob
+import json
+import errno
+import stat
+import time
+import zlib
+import shutil
 import hashlib
 import logging
+import marshal
+import tarfile
+import zipfile
 import argparse
+import cProfile
+import tempfile
+import posixpath
+import threading
+import subprocess
+import tracemalloc
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,11 +35,98 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(
 def generate_unique_id(content):
     return hashlib.md5(content.encode('utf-8')).hexdigest()
 
+def generate_stable_id(parent_id, content, occurrence):
+    """
+    Returns a node ID derived from its place in the outline rather than its line number.
+
+    The ID chains the parent's ID with the node's content and its occurrence among
+    earlier siblings with the same content. Inserting or removing lines elsewhere
+    leaves it unchanged. Hashing the parent's ID instead of the whole ancestor path
+    keeps the cost per node constant. An 8-byte blake2b digest is used: it is
+    faster than MD5, and unlike an optional third-party hash it gives the same IDs
+    on every install.
+    """
+    key = f"{parent_id}\x00{content}\x00{occurrence}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=8).hexdigest()
+
+ID_SCHEMES = ('path', 'line')
+
 def escape_title(title):
     if '"' in title:
         title = title.replace('"', '\\"')
     return f'title: "{title}"\n'
 
+class SanitizerEngine:
+    """
+    Precompiled, memoized implementation of the name sanitizers.
+
+    Each mode runs as one fused pass: a single anchored match for leading list
+    markers or digits, one str.translate for all removed characters, and a regex
+    only when dots are left to collapse. Results are kept in a bounded LRU keyed
+    on (name, mode, max_length), since outlines repeat names like "Overview" many
+    times. The output is identical to the original regex chain.
+    """
+    MODES = ('default', 'remove-digits')
+
+    LEADING_MARKERS = re.compile(r'[\.\-]+\s*')
+    LEADING_DIGITS = re.compile(r'\d+')
+    DOT_RUNS = re.compile(r'\.+')
+    DEFAULT_REMOVED = str.maketrans('', '', '<>:"/\\|?()')
+    ALTERNATIVE_REMOVED = str.maketrans('', '', '<>:"/\\|?.')
+    TAIL_REMOVED = str.maketrans('', '', ' ._')
+    SHORT_REMOVED = str.maketrans('', '', ' .')
+
+    def __init__(self, maxsize=65536):
+        self.maxsize = maxsize
+        self._sanitize = lru_cache(maxsize=maxsize)(self._sanitize_uncached)
+
+    def sanitize(self, name, mode='default', max_length=20):
+        return self._sanitize(name, mode, max_length)
+
+    def cache_info(self):
+        """
+        Returns the memo's hit and miss counters and its current size.
+        """
+        info = self._sanitize.cache_info()
+        return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'maxsize': info.maxsize}
+
+    def cache_clear(self):
+        self._sanitize.cache_clear()
+
+    def _sanitize_uncached(self, name, mode, max_length):
+        if mode == 'default':
+            # Strip list indicators at the very start, then drop invalid characters
+            match = self.LEADING_MARKERS.match(name)
+            if match:
+                name = name[match.end():]
+            name = name.translate(self.DEFAULT_REMOVED).strip()
+            if '.' in name:
+                name = self.DOT_RUNS.sub('_', name)
+        elif mode == 'remove-digits':
+            name = name.translate(self.ALTERNATIVE_REMOVED)
+            match = self.LEADING_DIGITS.match(name)
+            if match:
+                name = name[match.end():]
+            name = name.rstrip()
+        else:
+            raise ValueError(f"Unknown sanitizer mode {mode!r}, expected one of {', '.join(self.MODES)}")
+
+        # No dots are left at this point, so the name has no extension to split off
+
+        # Truncate the name if it exceeds the maximum length
+        if len(name) > max_length:
+            name = name[:max_length//2] + '...' + name[-max_length//2:]
+
+        # Disallow invalid folder characters like . or space in the last 5 characters
+        if len(name) > 5:
+            name = name[:-5] + name[-5:].translate(self.TAIL_REMOVED)
+        else:
+            name = name.translate(self.SHORT_REMOVED)
+
+        return name.replace('.', '')
+
+SANITIZER = SanitizerEngine()
+
 def sanitize_and_clean_name(name, max_length=20):
     """
     Strips list indicators, sanitizes, and truncates the name to ensure it is within the maximum length.
@@ -25,56 +135,49 @@ def sanitize_and_clean_name(name, max_length=20):
         name (str): The name to be sanitized and cleaned.
         max_length (int): The maximum length for the cleaned name.
     """
-    # Combine regex operations to remove periods, invalid characters, preserve double asterisks
-    name = re.sub(r'^[\.\-]+\s*|[<>:"/\\|?()]', '', name).strip()
-    name = re.sub(r'\.+', '_', name)
-    # Remove trailing spaces
-    name = name.rstrip()
-
-    # Truncate the name if it exceeds the maximum length
-    base, ext = os.path.splitext(name)
-    if len(base) > max_length:
-        base = base[:max_length//2] + '...' + base[-max_length//2:]
-
-    # Disallow invalid folder characters like . or space in the last 5 characters
-    if len(base) > 5:
-        base = base[:-5] + re.sub(r'[ ._]', '', base[-5:])
-    else:
-        base = re.sub(r'[ .]', '', base)
-
-    base = base.replace('.', '')
-    return base + ext
+    return SANITIZER.sanitize(name, 'default', max_length)
 
 def alternative_sanitize_and_clean_name(name, max_length=20):
     """
-    Alternative sanitization function that removes numbers and replaces periods with underscores.
-removes digits#######################also uses unsndersocres?
+    Alternative sanitization function that removes invalid characters, periods and leading digits.
+
     Args:
         name (str): The name to be sanitized and cleaned.
         max_length (int): The maximum length for the cleaned name.
     """
-    # Remove invalid characters and replace periods and numbers
-    name = re.sub(r'[<>:"/\\|?]', '', name)  # Remove invalid characters
-    name = re.sub(r'\.', '', name)  # Replace periods with nothing
-    name = re.sub(r'^\d+', '', name)  # Remove digits only if they appear as the first character in a line
+    return SANITIZER.sanitize(name, 'remove-digits', max_length)
+
+def render_md_file(content, lines, front_matter=None):
+    """
+    Renders front matter, content and additional lines into the text of a Markdown file.
 
+    Args:
+        content (str): The main content to write.
+        lines (list): Additional content lines to write.
+        front_matter (str, optional): The front matter to include at the top of the file.
 
-       # Remove trailing spaces
-    name = name.rstrip()
+    Returns:
+        str: The full file text.
+    """
+    parts = []
+    # Write the front matter if provided
+    if front_matter:
+        parts.append(front_matter)
 
-    # Truncate the name if it exceeds the maximum length
-    base, ext = os.path.splitext(name)
-    if len(base) > max_length:
-        base = base[:max_length//2] + '...' + base[-max_length//2:]
+    # Write the main content
+    parts.append(content + '\n')
 
-    # Disallow invalid folder characters like . or space in the last 5 characters
-    if len(base) > 5:
-        base = base[:-5] + re.sub(r'[ ._]', '', base[-5:])
-    else:
-        base = re.sub(r'[ .]', '', base)
+    # Write additional content lines, removing '**' markers
+    for line in lines:
+        parts.append(line.replace('**', '') + '\n')
+    return ''.join(parts)
 
-    base = base.replace('.', '')
-    return base + ext
+def write_text_file(path, text):
+    """
+    Writes already rendered text to a file whose directory exists.
+    """
+    with open(path, 'w', encoding='utf-8') as md_file:
+        md_file.write(text)
 
 def write_md_file(path, content, lines, front_matter=None):
     """
@@ -87,44 +190,188 @@ def write_md_file(path, content, lines, front_matter=None):
         front_matter (str, optional): The front matter to include at the top of the file.
     """
     os.makedirs(os.path.dirname(path), exist_ok=True)  # Ensure parent directories exist
-    with open(path, 'w', encoding='utf-8') as md_file:
-        # Write the front matter if provided
-        if front_matter:
-            #md_file.write('---\n')  # Start of front matter
-            md_file.write(front_matter)  # Write the front matter content
-            #md_file.write('---\n\n')  # End of front matter and add a blank line
+    write_text_file(path, render_md_file(content, lines, front_matter))
+
+class ParallelFileWriter:
+    """
+    Writes rendered files on a bounded thread pool.
+
+    Callers create directories themselves, in order, before submitting files into
+    them. At most max_pending files are queued at once, so memory stays bounded.
+    Writes to the same path keep their submission order, so the last one wins as
+    in a serial run. The first write error is re-raised from submit() or close().
+    """
+
+    def __init__(self, jobs, max_pending=None):
+        self.executor = ThreadPoolExecutor(max_workers=jobs)
+        self.slots = threading.BoundedSemaphore(max_pending or jobs * 4)
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.errors = []
+
+    def submit(self, path, text):
+        if self.errors:
+            raise self.errors[0]
+        with self.lock:
+            previous = self.in_flight.get(path)
+        if previous is not None:
+            wait([previous])
+        self.slots.acquire()
+        future = self.executor.submit(write_text_file, path, text)
+        with self.lock:
+            self.in_flight[path] = future
+        future.add_done_callback(lambda f: self._done(path, f))
+
+    def _done(self, path, future):
+        with self.lock:
+            if self.in_flight.get(path) is future:
+                del self.in_flight[path]
+        self.slots.release()
+        # Futures cancelled by an aborting shutdown have no result or exception to report
+        if not future.cancelled() and future.exception() is not None:
+            self.errors.append(future.exception())
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.errors:
+            raise self.errors[0]
 
-        # Write the main content
-        md_file.write(content + '\n')
+    def __enter__(self):
+        return self
 
-        # Write additional content lines
-        for line in lines:
-            # Remove '**' markers from the line
-            cleaned_line = line.replace('**', '')
-            # Write the cleaned line to the file
-            md_file.write(cleaned_line + '\n')
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            return False
+        self.close()
+        return False
 
-def categorize_lines(list_content):
+class OutlineNode:
     """
-    Categorizes lines from the list content into a hierarchical structure.
+    Compact outline node. Replaces the per-line dict used by earlier versions.
+
+    Leaves share an empty tuple for children and body lines, so only nodes that
+    actually have them allocate a list. Indexing with the legacy dict keys
+    ('IndentLevel', 'Content', 'Children', 'BodyLines', 'UniqueID', 'FULLLINE')
+    is supported as a read-only compatibility view, and as_dict() converts a
+    whole subtree to the old dict form.
+    """
+    __slots__ = ('indent_level', 'content', 'full_line', 'unique_id', 'children', 'body_lines')
+
+    LEGACY_KEYS = {
+        'IndentLevel': 'indent_level',
+        'Content': 'content',
+        'FULLLINE': 'full_line',
+        'UniqueID': 'unique_id',
+        'Children': 'children',
+        'BodyLines': 'body_lines',
+    }
+
+    def __init__(self, indent_level, content, full_line, unique_id):
+        self.indent_level = indent_level
+        self.content = content
+        self.full_line = full_line
+        self.unique_id = unique_id
+        self.children = ()
+        self.body_lines = ()
+
+    @classmethod
+    def root(cls):
+        return cls(None, None, None, 'root')
+
+    def add_child(self, child):
+        if self.children:
+            self.children.append(child)
+        else:
+            self.children = [child]
+
+    def add_body_line(self, line):
+        if self.body_lines:
+            self.body_lines.append(line)
+        else:
+            self.body_lines = [line]
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.LEGACY_KEYS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def as_dict(self):
+        """
+        Returns the subtree rooted at this node in the legacy dict form.
+        """
+        node = {
+            'Children': [child.as_dict() for child in self.children],
+            'BodyLines': list(self.body_lines),
+            'UniqueID': self.unique_id,
+        }
+        if self.indent_level is not None:
+            node['IndentLevel'] = self.indent_level
+            node['Content'] = self.content
+            node['FULLLINE'] = self.full_line
+        return node
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Builds a node tree from the legacy dict form.
+        """
+        node = cls(data.get('IndentLevel'), data.get('Content'), data.get('FULLLINE'), data['UniqueID'])
+        for line in data.get('BodyLines', []):
+            node.add_body_line(line)
+        for child in data.get('Children', []):
+            node.add_child(cls.from_dict(child))
+        return node
+
+def iter_outline_events(lines, id_scheme='path'):
+    """
+    Parses outline lines incrementally and yields node events as soon as they are known.
+
+    A node is emitted once the next structural line arrives, because only then are its
+    body lines complete and is it known whether it has children. Children are not kept
+    on the emitted nodes, so memory stays bounded by the nesting depth of the outline
+    (plus, for the 'path' ID scheme, the distinct names of each open level).
 
     Args:
-        list_content (list): The list of lines to categorize.
+        lines (iterable): Any iterable of lines, e.g. an open file object.
+        id_scheme (str): 'path' for IDs that stay stable across edits (see
+            generate_stable_id), or 'line' for the original MD5 of indent, content
+            and line number.
 
-    Returns:
-        dict: The hierarchical structure of categorized lines.
+    Yields:
+        tuple: (event, node) with an OutlineNode, where event is 'open' for a node whose children follow,
+        'leaf' for a node without children, and 'close' when an opened node's
+        indentation closes.
     """
-    stack = []
-    root = {'Children': [], 'BodyLines': [], 'UniqueID': 'root'}
+    if id_scheme not in ID_SCHEMES:
+        raise ValueError(f"Unknown ID scheme {id_scheme!r}, expected one of {', '.join(ID_SCHEMES)}")
+
+    stack = []  # Opened nodes, strictly increasing indentation
+    sibling_counts = [{}]  # Content occurrences per open level, root first
+    pending = None  # Last structural node; body lines may still follow
+
+    for line_number, line in enumerate(lines, 1):
+        line = line.rstrip()
 
-    for line_number, line in enumerate(list_content, 1):
         # Check if the line should be ignored based on the new rule
         if line_number <= 3 and line.strip().startswith('title:'):
             logging.info(f"Ignoring line {line_number} as it starts with 'title:' within the first 3 lines.")
             continue # Skip this line
 
-        # Preserve original line for body lines
-        original_line = line.rstrip()
+        # Body lines are never empty after sanitizing ('*' is kept), so they skip the sanitizer
+        if '**' in line:
+            if pending is None:
+                raise IndexError(f"Body line {line_number} appears before any outline entry")
+            pending.add_body_line(line)
+            continue
+
         # Sanitize and clean the line for structure determination
         line_content = sanitize_and_clean_name(line)
         indent_level = len(line) - len(line.lstrip())
@@ -133,133 +380,2285 @@ def categorize_lines(list_content):
         if not content:
             continue  # Skip empty lines
 
-        is_body_line = '**' in original_line
+        if pending is not None:
+            if pending.indent_level < indent_level:
+                yield 'open', pending
+                stack.append(pending)
+                sibling_counts.append({})
+            else:
+                yield 'leaf', pending
+                while stack and stack[-1].indent_level >= indent_level:
+                    sibling_counts.pop()
+                    yield 'close', stack.pop()
 
-        if is_body_line:
-            parent_node = stack[-1]
-            parent_node.setdefault('BodyLines', []).append(original_line)
-            continue
+        if id_scheme == 'path':
+            counts = sibling_counts[-1]
+            occurrence = counts.get(content, 0)
+            counts[content] = occurrence + 1
+            unique_id = generate_stable_id(stack[-1].unique_id if stack else 'root', content, occurrence)
+        else:
+            unique_id = generate_unique_id(f"{indent_level}_{content}_{line_number}")
 
-        unique_id = generate_unique_id(f"{indent_level}_{content}_{line_number}")
-        node = {
-            'IndentLevel': indent_level,
-            'Content': content,
-            'Children': [],
-            'BodyLines': [],
-            'UniqueID': unique_id,
-            'FULLLINE': line
-        }
+        pending = OutlineNode(indent_level, content, line, unique_id)
+
+    if pending is not None:
+        yield 'leaf', pending
+    while stack:
+        yield 'close', stack.pop()
+
+def build_outline(lines, id_scheme='path'):
+    """
+    Builds the compact hierarchical structure of an outline.
 
-        while stack and stack[-1]['IndentLevel'] >= indent_level:
+    Args:
+        lines (iterable): The lines to categorize.
+        id_scheme (str): The node ID scheme, see iter_outline_events.
+
+    Returns:
+        OutlineNode: The root node; its children are the top-level entries.
+    """
+    root = OutlineNode.root()
+    stack = [root]
+
+    for event, node in iter_outline_events(lines, id_scheme):
+        if event == 'close':
             stack.pop()
+            continue
+        stack[-1].add_child(node)
+        if event == 'open':
+            stack.append(node)
+
+    return root
 
-        if stack:
-            parent_node = stack[-1]
-            parent_node['Children'].append(node)
+def categorize_lines(list_content, id_scheme='path'):
+    """
+    Categorizes lines from the list content into a hierarchical structure.
+
+    Kept for code that expects the dict form; build_outline is the compact equivalent.
+
+    Args:
+        list_content (iterable): The lines to categorize.
+        id_scheme (str): The node ID scheme, see iter_outline_events.
+
+    Returns:
+        dict: The hierarchical structure of categorized lines.
+    """
+    return build_outline(list_content, id_scheme).as_dict()
+
+def iter_tree_events(node):
+    """
+    Yields the same (event, node) pairs as iter_outline_events for an already built tree.
+
+    Args:
+        node (OutlineNode): The node whose descendants to walk.
+    """
+    stack = [(node, iter(node.children))]
+    while stack:
+        child = next(stack[-1][1], None)
+        if child is None:
+            parent, _ = stack.pop()
+            if stack:
+                yield 'close', parent
+        elif child.children:
+            yield 'open', child
+            stack.append((child, iter(child.children)))
         else:
-            root['Children'].append(node)
+            yield 'leaf', child
 
-        stack.append(node)
+# Outline Diffing
 
-    return root
+class OutlineDiff:
+    """
+    Node-level differences between two parsed outlines.
+
+    inserted and deleted hold nodes of the new and old outline. renamed, moved and
+    body_changed hold (old_node, new_node) pairs: renamed entries changed their
+    text, moved entries were found under a different parent, and body_changed
+    entries have new body lines (or, keeping their text, a new title line, e.g.
+    after an indentation change). A pair can appear in more than one list.
+    matches maps every new node that has a counterpart to its old node.
+    """
+    CATEGORIES = ('inserted', 'deleted', 'renamed', 'moved', 'body_changed')
+
+    def __init__(self):
+        self.inserted = []
+        self.deleted = []
+        self.renamed = []
+        self.moved = []
+        self.body_changed = []
+        self.matches = {}
+
+    def touched(self):
+        """
+        Returns the new nodes whose output has to be rendered again.
+        """
+        touched = set(self.inserted)
+        for pairs in (self.renamed, self.moved, self.body_changed):
+            touched.update(new for _, new in pairs)
+        return touched
+
+    def counts(self):
+        return {name: len(getattr(self, name)) for name in self.CATEGORIES}
+
+    def __bool__(self):
+        return any(getattr(self, name) for name in self.CATEGORIES)
+
+def _preorder_with_parents(root):
+    nodes = []
+    stack = [(child, root) for child in reversed(root.children)]
+    while stack:
+        node, parent = stack.pop()
+        nodes.append((node, parent))
+        stack.extend((child, node) for child in reversed(node.children))
+    return nodes
+
+def diff_outlines(old_root, new_root):
+    """
+    Compares two outline trees as built by build_outline, without touching the filesystem.
+
+    Matching runs top-down from the roots. Children of matched parents are paired
+    by unique ID, then by text, then by identical body lines. Unmatched nodes
+    anywhere are then paired by text plus body (moves), and finally remaining
+    children of matched parents are paired by position (renames). Descendants of
+    every new pair are matched the same way. Every node is looked at a constant
+    number of times, so the cost is linear in the size of the outlines.
+
+    Returns:
+        OutlineDiff: The differences.
+    """
+    diff = OutlineDiff()
+    matches = diff.matches
+    old_matched = set()
+    old_parents = {}
+    worklist = deque()
+
+    def pair(old, new, moved=False):
+        matches[new] = old
+        old_matched.add(old)
+        worklist.append((old, new))
+        if moved:
+            diff.moved.append((old, new))
+        if old.content != new.content:
+            diff.renamed.append((old, new))
+        if tuple(old.body_lines) != tuple(new.body_lines) or (old.content == new.content
+                                                              and old.full_line != new.full_line):
+            diff.body_changed.append((old, new))
+
+    def match_children(old, new):
+        olds = [child for child in old.children if child not in old_matched]
+        news = [child for child in new.children if child not in matches]
+        if not olds or not news:
+            return
+
+        by_id = {child.unique_id: child for child in olds}
+        by_content = {}
+        for child in olds:
+            by_content.setdefault(child.content, deque()).append(child)
+        by_body = {}
+        for child in olds:
+            if child.body_lines:
+                by_body.setdefault(tuple(child.body_lines), deque()).append(child)
+
+        def take(queue):
+            while queue:
+                candidate = queue.popleft()
+                if candidate not in old_matched:
+                    return candidate
+            return None
+
+        for key_of, index in ((lambda child: child.unique_id, by_id),
+                              (lambda child: child.content, by_content),
+                              (lambda child: tuple(child.body_lines), by_body)):
+            remaining = []
+            for child in news:
+                found = index.get(key_of(child))
+                if isinstance(found, deque):
+                    found = take(found)
+                elif found is not None and found in old_matched:
+                    found = None
+                if found is None:
+                    remaining.append(child)
+                else:
+                    pair(found, child)
+            news = remaining
+
+    def drain():
+        while worklist:
+            match_children(*worklist.popleft())
+
+    def key_of(node):
+        return node.content, tuple(node.body_lines)
+
+    # Top-down matching from the roots
+    matches[new_root] = old_root
+    old_matched.add(old_root)
+    worklist.append((old_root, new_root))
+    drain()
+
+    old_nodes = _preorder_with_parents(old_root)
+    new_nodes = _preorder_with_parents(new_root)
+    for node, parent in old_nodes:
+        old_parents[node] = parent
+    positions = {child: position for position, child in enumerate(new_root.children)}
+    for node, _ in new_nodes:
+        for position, child in enumerate(node.children):
+            positions[child] = position
+
+    movable = {}
+    for node, _ in old_nodes:
+        if node not in old_matched:
+            movable.setdefault(key_of(node), deque()).append(node)
+    arriving = {key_of(node) for node, _ in new_nodes if node not in matches}
+
+    def rename_pass(unambiguous):
+        # Pairs the unmatched child at the same position under matched parents;
+        # the first pass leaves out nodes that may be one end of a move
+        for node, parent in new_nodes:
+            if node in matches or parent not in matches:
+                continue
+            old_parent = matches[parent]
+            position = positions[node]
+            if position >= len(old_parent.children):
+                continue
+            candidate = old_parent.children[position]
+            if candidate in old_matched:
+                continue
+            if unambiguous and (key_of(node) in movable or key_of(candidate) in arriving):
+                continue
+            pair(candidate, node)
+            drain()
+
+    rename_pass(unambiguous=True)
+
+    # Moves: same text and body anywhere in the old outline
+    for node, parent in new_nodes:
+        if node in matches:
+            continue
+        queue = movable.get(key_of(node))
+        while queue:
+            candidate = queue.popleft()
+            if candidate not in old_matched:
+                pair(candidate, node, moved=matches.get(parent) is not old_parents[candidate])
+                drain()
+                break
+
+    rename_pass(unambiguous=False)
+
+    diff.inserted = [node for node, _ in new_nodes if node not in matches]
+    diff.deleted = [node for node, _ in old_nodes if node not in old_matched]
+    return diff
+
+# Path Planning
+
+class PlanEntry:
+    """
+    One step of a path plan.
+
+    kind is 'dir' for a directory to create, 'file' for a Markdown file to write and
+    'skip' for a leaf that gets a path but no output (see allow_empty_folders).
+    node_path is the node's path without extension, as stored in id_to_path_map.
+    suffixed is True when a name collision forced a unique suffix, and promoted is
+    True when a leaf became a folder because one of its siblings has children.
+    """
+    __slots__ = ('kind', 'path', 'node', 'node_path', 'suffixed', 'promoted')
+
+    def __init__(self, kind, path, node, node_path, suffixed=False, promoted=False):
+        self.kind = kind
+        self.path = path
+        self.node = node
+        self.node_path = node_path
+        self.suffixed = suffixed
+        self.promoted = promoted
+
+    def render(self):
+        """
+        Returns the text of a 'file' entry.
+        """
+        return render_node(self.node)
+
+def render_node(node, body_lines=None):
+    """
+    Renders the Markdown file of a node: escaped title front matter plus its body
+    lines, or the given replacement body lines.
+    """
+    # Prepare the front matter with proper escaping
+    title_line = escape_title(node.full_line)
+    front_matter = f"---\n{title_line}---\n\n"
+    return render_md_file('', node.body_lines if body_lines is None else body_lines, front_matter)
+
+def iter_path_plan(events, base_dir, sanitize_function, allow_empty_folders, id_to_path_map=None):
+    """
+    Computes the final path of every node without touching the filesystem.
+
+    Name collisions are resolved against an in-memory set of the names already used
+    in each directory, compared case-insensitively so the plan is the same on every
+    platform. A colliding name gets '_' plus the first six characters of the node's
+    unique ID. 'index' is reserved in every directory for the index.md file.
+
+    Directory entries always come before anything placed inside them. With
+    allow_empty_folders, leaves are held back until a sibling with children shows
+    up or their parent closes, because whether they become folders depends on their
+    siblings; memory is then bounded by the fan-out instead of the depth.
+
+    Args:
+        events (iterable): (event, node) pairs as yielded by iter_outline_events.
+        base_dir (str): The path to the output base directory.
+        sanitize_function (function): The function to use for sanitizing names.
+        allow_empty_folders (bool): Whether to allow empty folders.
+        id_to_path_map (dict, optional): Filled with a mapping from unique IDs to paths.
+
+    Yields:
+        PlanEntry: The plan steps, in write order.
+    """
+    invalid_names = ('.', '..')
+    sep, altsep = os.sep, os.altsep or os.sep
+
+    def place(node, frame):
+        name = sanitize_function(node.content)
+        if name in invalid_names or sep in name or altsep in name:
+            raise ValueError(f"Invalid path detected: {name!r} is not a name within {frame['path']}")
+
+        # Handle name conflicts by appending a unique identifier
+        suffixed = False
+        if not name or name.casefold() in frame['names']:
+            base = name + '_' + node.unique_id[:6]
+            name, counter = base, 1
+            while name.casefold() in frame['names']:
+                counter += 1
+                name = f"{base}_{counter}"
+            suffixed = True
+        frame['names'].add(name.casefold())
+
+        # Same as os.path.join, since a sanitized name never contains a separator
+        node_path = frame['prefix'] + name
+        if id_to_path_map is not None:
+            id_to_path_map[node.unique_id] = node_path
+        return node_path, suffixed
+
+    def new_frame(path):
+        return {'path': path, 'prefix': os.path.join(path, ''), 'names': {'index'}, 'leaves': [],
+                'has_branch': False}
+
+    def as_folder(node, frame, promoted=False):
+        node_path, suffixed = place(node, frame)
+        return node_path, (PlanEntry('dir', node_path, node, node_path, suffixed, promoted),
+                           PlanEntry('file', os.path.join(node_path, 'index.md'), node, node_path, suffixed, promoted))
+
+    stack = [new_frame(os.path.normpath(base_dir))]
+
+    for event, node in events:
+        frame = stack[-1]
+        if event == 'open':
+            if allow_empty_folders and not frame['has_branch']:
+                for leaf in frame['leaves']:
+                    yield from as_folder(leaf, frame, promoted=True)[1]
+                frame['leaves'] = []
+                frame['has_branch'] = True
+            node_path, entries = as_folder(node, frame)
+            yield from entries
+            stack.append(new_frame(node_path))
+        elif event == 'leaf':
+            if not allow_empty_folders:
+                node_path, suffixed = place(node, frame)
+                yield PlanEntry('file', node_path + '.md', node, node_path, suffixed)
+            elif frame['has_branch']:
+                yield from as_folder(node, frame, promoted=True)[1]
+            else:
+                frame['leaves'].append(node)
+        else:
+            # Leaves whose siblings never had children are placed but not written
+            stack.pop()
+            for leaf in frame['leaves']:
+                node_path, suffixed = place(leaf, frame)
+                yield PlanEntry('skip', node_path, leaf, node_path, suffixed)
+
+    for leaf in stack[0]['leaves']:
+        node_path, suffixed = place(leaf, stack[0])
+        yield PlanEntry('skip', node_path, leaf, node_path, suffixed)
+
+# Docusaurus Metadata
+
+# Docusaurus strips number prefixes like '1_ ' or '02-' from doc IDs, but not dates or versions
+IGNORED_NUMBER_PREFIX = re.compile(r'^\d+[-_.]\d+')
+NUMBER_PREFIX = re.compile(r'^(\d+)\s*[-_.]+\s*([^-_.\s].*)$')
+LIST_MARKER = re.compile(r'^(?:[-*+]|\d+[.)])\s+')
+
+def strip_number_prefix(name):
+    """
+    Returns name as Docusaurus uses it in doc IDs, without a leading number prefix.
+    """
+    if IGNORED_NUMBER_PREFIX.match(name):
+        return name
+    match = NUMBER_PREFIX.match(name)
+    return match.group(2) if match else name
+
+def outline_label(node):
+    """
+    Returns the sidebar label of a node: its full line without the list marker.
+    """
+    full_line = node.full_line.strip()
+    return LIST_MARKER.sub('', full_line, count=1) or full_line
+
+class RenderedEntry(PlanEntry):
+    """
+    A 'file' plan entry whose text is already rendered (generated metadata, resolved links).
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, path, node, node_path, text, suffixed=False, promoted=False):
+        super().__init__('file', path, node, node_path, suffixed, promoted)
+        self.text = text
+
+    def render(self):
+        return self.text
+
+class DocusaurusSidebar:
+    """
+    Builds Docusaurus sidebar metadata from plan entries while they are written.
+
+    Items keep the outline order. Folders become categories linked to their
+    index.md, except folders without children (see allow_empty_folders), which
+    become plain doc items. Doc IDs follow Docusaurus: the path relative to the
+    docs folder without extension, with number prefixes stripped from every
+    segment. Nothing is read back from disk.
+
+    Args:
+        categories (bool): Add a _category_.json (label and position) to every folder.
+        sidebars_file (str, optional): Where save() writes the complete sidebars.js.
+        id_prefix (str): Path of the output directory within the Docusaurus docs folder.
+        sidebar_name (str): Name of the sidebar in sidebars.js.
+    """
+    CATEGORY_FILE = '_category_.json'
+
+    def __init__(self, categories=False, sidebars_file=None, id_prefix='', sidebar_name='tutorialSidebar'):
+        self.categories = categories
+        self.sidebars_file = sidebars_file
+        self.id_prefix = ''.join(strip_number_prefix(part) + '/' for part in id_prefix.replace(os.sep, '/').split('/')
+                                 if part and part != '.')
+        self.sidebar_name = sidebar_name
+        self.items = []
+        self._categories = []
+
+    def process(self, plan, base_dir):
+        """
+        Passes plan through, recording every entry and, with categories, adding a
+        _category_.json entry after each folder.
+        """
+        self.items = []
+        # Folder path -> (its items, its doc ID prefix, its category)
+        folders = {os.path.normpath(base_dir): (self.items, self.id_prefix, None)}
+        self._categories = []
+        doc_ids = set()
+        duplicates = []
+
+        for entry in plan:
+            yield entry
+            if entry.kind == 'skip':
+                continue
+            parent_path, name = os.path.split(entry.path)
+            label = outline_label(entry.node)
+
+            if entry.kind == 'dir':
+                items, id_prefix, _ = folders[parent_path]
+                category = {'type': 'category', 'label': label, 'items': []}
+                items.append(category)
+                folders[entry.path] = (category['items'], id_prefix + strip_number_prefix(name) + '/', category)
+                self._categories.append(category)
+                if self.categories:
+                    text = json.dumps({'label': label, 'position': len(items)}, indent=2, ensure_ascii=False) + '\n'
+                    yield RenderedEntry(os.path.join(entry.path, self.CATEGORY_FILE), entry.node, entry.node_path, text)
+                continue
+
+            items, id_prefix, category = folders[parent_path]
+            if name == 'index.md' and entry.node_path == parent_path:
+                doc_id = id_prefix + 'index'
+                category['link'] = {'type': 'doc', 'id': doc_id}
+            else:
+                doc_id = id_prefix + strip_number_prefix(name[:-3])
+                items.append({'type': 'doc', 'id': doc_id, 'label': label})
+            if doc_id in doc_ids:
+                duplicates.append(doc_id)
+            doc_ids.add(doc_id)
+
+        if duplicates:
+            shown = ', '.join(repr(doc_id) for doc_id in duplicates[:5])
+            more = f" and {len(duplicates) - 5} more" if len(duplicates) > 5 else ""
+            logging.warning(f"{len(duplicates)} Docusaurus doc IDs clash once number prefixes are stripped: "
+                            f"{shown}{more}. Docusaurus will refuse to build until those entries are renamed.")
+
+    def render(self):
+        """
+        Returns the text of a sidebars.js holding every recorded item.
+        """
+        for category in self._categories:
+            if not category['items'] and 'link' in category:
+                label, doc_id = category['label'], category['link']['id']
+                category.clear()
+                category.update(type='doc', id=doc_id, label=label)
+        items = json.dumps(self.items, indent=2, ensure_ascii=False).replace('\n', '\n  ')
+        return ("// Generated by d2c2_cli.py. Changes are overwritten on the next run.\n\n"
+                "/** @type {import('@docusaurus/plugin-content-docs').SidebarsConfig} */\n"
+                f"const sidebars = {{\n  {json.dumps(self.sidebar_name)}: {items},\n}};\n\n"
+                "module.exports = sidebars;\n")
+
+    def save(self):
+        """
+        Writes sidebars_file, unless it already has the same content.
+        """
+        if not self.sidebars_file:
+            return
+        text = self.render()
+        try:
+            with open(self.sidebars_file, 'r', encoding='utf-8') as f:
+                if f.read() == text:
+                    return
+        except FileNotFoundError:
+            pass
+        write_text_file(self.sidebars_file, text)
+
+# Cross-references
+
+# [[target]] or [[target|link text]]
+LINK_REFERENCE = re.compile(r'\[\[([^\[\]|]+)(?:\|([^\[\]]+))?\]\]')
+
+class LinkResolver:
+    """
+    Rewrites [[target]] and [[target|text]] references in body lines into relative Markdown links.
+
+    A target is another entry's title (its line without the list marker, compared
+    case-insensitively) or its path relative to the base directory, as recorded
+    in id_to_path_map, with or without '.md'. All entries are indexed once, so
+    each reference costs one lookup. References that match nothing, match
+    several titles, or point at an entry without a file are left as written and
+    reported together; broken then holds (source file, reference, reason) tuples.
+    """
+
+    def __init__(self):
+        self.broken = []
+
+    def resolve(self, plan, base_dir):
+        """
+        Returns plan as a list, with every file entry whose body lines hold references
+        replaced by a RenderedEntry with the links resolved.
+        """
+        plan = list(plan)
+        base_dir = os.path.normpath(base_dir)
+        cut = len(base_dir if base_dir.endswith(os.sep) else base_dir + os.sep)
+
+        def relative(path):
+            return path[cut:].replace(os.sep, '/')
+
+        by_title = {}
+        by_path = {}
+        files = {}
+        for entry in plan:
+            if entry.kind == 'dir':
+                continue  # Folders also have an index.md entry
+            by_title.setdefault(outline_label(entry.node).casefold(), []).append(entry.node)
+            by_path[relative(entry.node_path).casefold()] = entry.node
+            if entry.kind == 'file':
+                files[entry.node] = relative(entry.path)
+
+        self.broken = []
+        for position, entry in enumerate(plan):
+            if entry.kind != 'file' or not any('[[' in line for line in entry.node.body_lines):
+                continue
+            source = files[entry.node]
+            source_dir = posixpath.dirname(source) or '.'
+
+            def replace(match):
+                reference, text = match.group(1).strip(), match.group(2)
+                key = reference.strip('/')
+                if key.endswith('.md'):
+                    key = key[:-3]
+                target = by_path.get(key.casefold())
+                if target is None:
+                    candidates = by_title.get(reference.casefold(), ())
+                    if len(candidates) > 1:
+                        self.broken.append((source, reference, f'matches {len(candidates)} entries'))
+                        return match.group(0)
+                    target = candidates[0] if candidates else None
+                if target is None:
+                    self.broken.append((source, reference, 'no such entry'))
+                    return match.group(0)
+                if target not in files:
+                    self.broken.append((source, reference, 'the entry has no page'))
+                    return match.group(0)
+                link = urllib.parse.quote(posixpath.relpath(files[target], source_dir))
+                return f"[{(text or outline_label(target)).strip()}]({link})"
+
+            lines = [LINK_REFERENCE.sub(replace, line) if '[[' in line else line for line in entry.node.body_lines]
+            plan[position] = RenderedEntry(entry.path, entry.node, entry.node_path, render_node(entry.node, lines),
+                                           entry.suffixed, entry.promoted)
+
+        if self.broken:
+            shown = '; '.join(f"{reference!r} in {source} ({reason})" for source, reference, reason in self.broken[:10])
+            more = f"; and {len(self.broken) - 10} more" if len(self.broken) > 10 else ""
+            logging.warning(f"{len(self.broken)} cross-references could not be resolved: {shown}{more}")
+        return plan
 
 # Structure Creation Function (Copied from Docs2saurus/d2c2.py)
-def create_structure(node, parent_path, id_to_path_map, sanitize_function, allow_empty_folders):
+class OutputManifest:
+    """
+    Record of the files a run produced, kept in the base directory.
+
+    Maps each output path, relative to the base directory and with '/' separators,
+    to the hash of its rendered text. In incremental mode, files whose hash matches
+    the previous run are not rewritten, so their mtimes stay untouched. Delete the
+    manifest to force a full rewrite.
+    """
+    FILE_NAME = '.d2c2-manifest.json'
+    VERSION = 1
+
+    def __init__(self, base_dir, previous=None, incremental=False):
+        self.base_dir = os.path.normpath(base_dir)
+        self.prefix = self.base_dir + os.sep
+        self.previous = previous or {}
+        self.incremental = incremental
+        self.files = {}
+        self.counts = {'added': 0, 'changed': 0, 'unchanged': 0}
+
+    @classmethod
+    def load(cls, base_dir, incremental=False):
+        """
+        Loads the manifest left by the previous run; a missing or unreadable one counts as empty.
+        """
+        path = os.path.join(base_dir, cls.FILE_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            previous = data['files'] if data.get('version') == cls.VERSION else {}
+        except FileNotFoundError:
+            previous = {}
+        except (ValueError, KeyError, AttributeError) as e:
+            logging.warning(f"Ignoring unreadable manifest {path}: {e}")
+            previous = {}
+        return cls(base_dir, previous, incremental)
+
+    def relpath(self, path):
+        if path.startswith(self.prefix):
+            path = path[len(self.prefix):]
+        else:
+            path = os.path.relpath(path, self.base_dir)
+        return path.replace(os.sep, '/')
+
+    def needs_write(self, path, text):
+        """
+        Records a rendered file and returns whether it has to be written.
+        """
+        rel = self.relpath(path)
+        digest = content_hash(text)
+        self.files[rel] = digest
+        previous = self.previous.get(rel)
+        if previous is None:
+            self.counts['added'] += 1
+        elif previous != digest:
+            self.counts['changed'] += 1
+        else:
+            self.counts['unchanged'] += 1
+            return not self.incremental
+        return True
+
+    def keep(self, path):
+        """
+        Records a file known to be unchanged without rendering or hashing it again.
+        """
+        rel = self.relpath(path)
+        self.files[rel] = self.previous[rel]
+        self.counts['unchanged'] += 1
+
+    @property
+    def removed(self):
+        """
+        Paths written by the previous run that this run did not produce.
+        """
+        return sorted(self.previous.keys() - self.files.keys())
+
+    def summary(self):
+        written = self.counts['added'] + self.counts['changed']
+        if not self.incremental:
+            written += self.counts['unchanged']
+        return dict(self.counts, removed=len(self.removed), written=written)
+
+    def save(self):
+        """
+        Writes the manifest atomically, so an interrupted run never leaves a partial one.
+        """
+        path = os.path.join(self.base_dir, self.FILE_NAME)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.VERSION, 'files': self.files}, f, sort_keys=True, separators=(',', ':'))
+        os.replace(tmp_path, path)
+
+class WriteCounter:
+    """
+    Takes the place of an OutputManifest on runs that keep none. Every file is
+    written and only counted, so no per-file state is held and memory stays
+    bounded by the nesting depth of the outline.
+    """
+
+    def __init__(self):
+        self.written = 0
+
+    def needs_write(self, path, text):
+        self.written += 1
+        return True
+
+    def summary(self):
+        return {'written': self.written}
+
+    def save(self):
+        pass
+
+def prune_stale_outputs(base_dir, removed, keep=(), written=()):
+    """
+    Deletes files a previous run produced that the current plan no longer contains.
+
+    Only paths listed in the previous manifest are touched; directories are removed
+    once they become empty, walking up towards base_dir. The cost is proportional
+    to the number of removed files, not the size of the tree.
+
+    A removed path that differs from a written one only in case is left alone when
+    both name the same file, as on case-insensitive filesystems: deleting it would
+    delete the file this run just wrote.
+
+    Args:
+        base_dir (str): The path to the output base directory.
+        removed (iterable): Manifest-relative paths, as returned by OutputManifest.removed.
+        keep (set, optional): Directory paths to leave in place even when empty.
+        written (iterable, optional): Manifest-relative paths of the current run's files.
+
+    Returns:
+        tuple: (files_removed, directories_removed)
+    """
+    base_dir = os.path.normpath(base_dir)
+    files_removed = 0
+    candidates = set()
+    folded = None
+
+    for rel in removed:
+        parts = rel.split('/')
+        if os.path.isabs(rel) or '..' in parts or '' in parts:
+            logging.warning(f"Not pruning {rel!r}: it is not a path within {base_dir}")
+            continue
+        path = os.path.join(base_dir, *parts)
+        if folded is None:
+            folded = {written_rel.casefold(): written_rel for written_rel in written}
+        twin = folded.get(rel.casefold())
+        if twin is not None:
+            try:
+                if os.path.samefile(path, os.path.join(base_dir, *twin.split('/'))):
+                    continue  # Only the case changed; this is the file just written
+            except OSError:
+                pass
+        try:
+            os.remove(path)
+            files_removed += 1
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.error(f"Failed to delete file {path}: {e}")
+            continue
+        candidates.add(os.path.dirname(path))
+
+    directories_removed = 0
+    for directory in sorted(candidates, key=lambda d: d.count(os.sep), reverse=True):
+        while directory != base_dir and directory.startswith(base_dir + os.sep) and directory not in keep:
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break  # Not empty (or already gone); its parents are not empty either
+            directories_removed += 1
+            directory = os.path.dirname(directory)
+
+    return files_removed, directories_removed
+
+def content_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+class PlanCache:
+    """
+    On-disk cache of path plans, so an outline converted before is not parsed again.
+
+    Entries are keyed by a hash of the input bytes, the sanitizer, the
+    allow_empty_folders setting and the ID scheme. An entry holds every planned
+    node (text, title line, ID, body lines) and plan step, with paths relative to
+    the base directory, as zlib-compressed marshal data. Bump VERSION whenever a
+    change to the parser or planner can change a plan. Entries unused for max_age
+    seconds are evicted, and the least recently used ones once the cache exceeds
+    max_size bytes.
+    """
+    VERSION = 1
+    MAGIC = b'D2C2PLAN'
+    SUFFIX = '.plan'
+    SANITIZER_MODES = {
+        sanitize_and_clean_name: 'default',
+        alternative_sanitize_and_clean_name: 'remove-digits',
+    }
+
+    def __init__(self, cache_dir, max_size=256 * 2**20, max_age=30 * 86400):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.max_age = max_age
+
+    def key(self, data, sanitize_function, allow_empty_folders, id_scheme):
+        mode = self.SANITIZER_MODES.get(sanitize_function)
+        if mode is None:
+            mode = f"{sanitize_function.__module__}.{sanitize_function.__qualname__}"
+        digest = hashlib.blake2b(data, digest_size=16)
+        # marshal output is only readable by the Python version that wrote it
+        digest.update(f"\0{self.VERSION}\0{sys.version_info[:2]}\0{os.sep}\0{mode}\0{allow_empty_folders}"
+                      f"\0{id_scheme}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    @staticmethod
+    def _prefix(base_dir):
+        base_dir = os.path.normpath(base_dir)
+        return base_dir if base_dir.endswith(os.sep) else base_dir + os.sep
+
+    def load(self, key, base_dir):
+        """
+        Returns the cached plan for base_dir as a list of PlanEntry objects, or None on a miss.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logging.warning(f"Ignoring unreadable cache entry {path}: {e}")
+            return None
+
+        try:
+            if not data.startswith(self.MAGIC):
+                raise ValueError("bad header")
+            nodes, steps = marshal.loads(zlib.decompress(data[len(self.MAGIC):]))
+        except (ValueError, EOFError, TypeError, zlib.error) as e:
+            logging.warning(f"Ignoring corrupt cache entry {path}: {e}")
+            return None
+
+        try:
+            os.utime(path)  # Marks the entry as recently used
+        except OSError:
+            pass
+
+        node_objects = []
+        for indent_level, content, full_line, unique_id, body_lines in nodes:
+            node = OutlineNode(indent_level, content, full_line, unique_id)
+            if body_lines:
+                node.body_lines = list(body_lines)
+            node_objects.append(node)
+
+        prefix = self._prefix(base_dir)
+        return [PlanEntry(kind, prefix + rel, node_objects[index], prefix + node_rel, suffixed, promoted)
+                for kind, rel, index, node_rel, suffixed, promoted in steps]
+
+    def record(self, key, base_dir, plan):
+        """
+        Passes plan through and stores it once it has been consumed completely.
+        """
+        cut = len(self._prefix(base_dir))
+        nodes = []
+        indexes = {}
+        steps = []
+        for entry in plan:
+            node = entry.node
+            index = indexes.get(node)
+            if index is None:
+                index = indexes[node] = len(nodes)
+                nodes.append((node.indent_level, node.content, node.full_line, node.unique_id,
+                              tuple(node.body_lines)))
+            steps.append((entry.kind, entry.path[cut:], index, entry.node_path[cut:], entry.suffixed,
+                          entry.promoted))
+            yield entry
+        self.store(key, (nodes, steps))
+
+    def store(self, key, payload):
+        """
+        Writes an entry atomically and evicts stale ones. Failures are logged, never raised.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(self.MAGIC)
+                    f.write(zlib.compress(marshal.dumps(payload), 1))
+                os.replace(tmp_path, self.path(key))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+            self.evict()
+        except OSError as e:
+            logging.warning(f"Could not write to the plan cache {self.cache_dir}: {e}")
+
+    def evict(self):
+        """
+        Deletes entries older than max_age, then the least recently used beyond max_size.
+        """
+        now = time.time()
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.endswith(self.SUFFIX):
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+                elif entry.name.endswith('.tmp') and now - st.st_mtime > 3600:
+                    entries.append((0, 0, entry.path))  # Left behind by an interrupted run
+
+        total = 0
+        for mtime, size, path in sorted(entries, reverse=True):
+            total += size
+            if total > self.max_size or now - mtime > self.max_age:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+class RunMetrics:
+    """
+    Per-phase wall time, peak memory and counters for one run.
+
+    Phases nest and interleave (the writer pulls from the planner, which pulls
+    from the parser), so time is exclusive: entering a phase pauses the one it
+    interrupts. Peak memory is the highest traced allocation seen while a phase,
+    or one nested in it, was active; it is only recorded with trace_memory,
+    which slows the run down considerably.
+    """
+    COUNTERS = ('nodes_parsed', 'body_lines', 'files_written', 'bytes_written', 'directories_created',
+                'collisions_resolved', 'cache_hits')
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.phases = {}
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.wall_time = 0.0
+        self.peak_memory = 0
+        self._stack = []  # [name, started] of the active phases, innermost last
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self._wall_started = time.perf_counter()
+
+    def stop(self):
+        self.wall_time = time.perf_counter() - self._wall_started
+        if self.trace_memory:
+            self._fold_peak()
+            tracemalloc.stop()
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def _fold_peak(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak_memory = max(self.peak_memory, peak)
+        for name, _ in self._stack:
+            stats = self.phases[name]
+            stats['peak_memory'] = max(stats['peak_memory'], peak)
+        tracemalloc.reset_peak()
+
+    def _enter(self, name):
+        now = time.perf_counter()
+        if self._stack:
+            self.phases[self._stack[-1][0]]['time'] += now - self._stack[-1][1]
+        if self.trace_memory:
+            self._fold_peak()
+        stats = self.phases.setdefault(name, {'time': 0.0, 'calls': 0, 'peak_memory': 0})
+        stats['calls'] += 1
+        self._stack.append([name, now])
+
+    def _exit(self):
+        if self.trace_memory:
+            self._fold_peak()
+        now = time.perf_counter()
+        name, started = self._stack.pop()
+        self.phases[name]['time'] += now - started
+        if self._stack:
+            self._stack[-1][1] = now
+
+    @contextmanager
+    def phase(self, name):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, name, iterable):
+        """
+        Wraps an iterable so the time spent producing each item counts towards a phase.
+        """
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            yield item
+
+    def wrap(self, name, function):
+        """
+        Wraps a function so its calls count towards a phase.
+        """
+        def timed_function(*args, **kwargs):
+            with self.phase(name):
+                return function(*args, **kwargs)
+        return timed_function
+
+    def track_events(self, events):
+        """
+        Times parser events as the 'parse' phase and counts nodes and body lines.
+        """
+        for event, node in self.timed('parse', events):
+            if event != 'close':
+                self.counters['nodes_parsed'] += 1
+                self.counters['body_lines'] += len(node.body_lines)
+            yield event, node
+
+    def report(self):
+        return {
+            'wall_time': self.wall_time,
+            'peak_memory': self.peak_memory if self.trace_memory else None,
+            'phases': self.phases,
+            'counters': self.counters,
+            'sanitizer_cache': SANITIZER.cache_info(),
+        }
+
+class NullMetrics:
+    """
+    Stand-in for RunMetrics when nothing is measured.
+    """
+    _null_phase = nullcontext()
+
+    def count(self, name, amount=1):
+        pass
+
+    def phase(self, name):
+        return self._null_phase
+
+    def timed(self, name, iterable):
+        return iterable
+
+    def wrap(self, name, function):
+        return function
+
+    def track_events(self, events):
+        return events
+
+NULL_METRICS = NullMetrics()
+
+# Output Writers
+
+class OutputWriter:
+    """
+    Where write_plan puts the planned directories and files.
+
+    make_dir() receives each directory before anything inside it and returns whether
+    it was created; write_file() receives each file with its rendered text. Paths
+    are the planned ones; name() turns them into '/'-separated paths relative to
+    base_dir. Use as a context manager: the output is only completed when the
+    block succeeds, and discarded where the backend allows otherwise.
+    """
+
+    def __init__(self, base_dir=os.curdir):
+        base_dir = os.path.normpath(base_dir)
+        self.cut = len(base_dir if base_dir.endswith(os.sep) else base_dir + os.sep)
+
+    def name(self, path):
+        return path[self.cut:].replace(os.sep, '/')
+
+    def make_dir(self, path):
+        return False
+
+    def write_file(self, path, text):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+class DiskWriter(OutputWriter):
+    """
+    Writes to the filesystem, the default. With jobs > 1 files are written by a
+    ParallelFileWriter; directories are always created in order on the calling thread.
+    """
+
+    def __init__(self, jobs=1):
+        super().__init__()
+        self.pool = ParallelFileWriter(jobs) if jobs > 1 else None
+        self.write_file = self.pool.submit if self.pool else write_text_file
+
+    def make_dir(self, path):
+        return make_dir(path)
+
+    def close(self):
+        if self.pool:
+            self.pool.close()
+
+    def abort(self):
+        if self.pool:
+            self.pool.executor.shutdown(wait=True, cancel_futures=True)
+
+class MemoryWriter(OutputWriter):
+    """
+    Keeps the output in memory: directories holds the directory names in creation
+    order and files maps file names to their UTF-8 bytes, both relative to base_dir.
+    Used for previews and benchmarks that should not touch the disk.
+    """
+
+    def __init__(self, base_dir=os.curdir):
+        super().__init__(base_dir)
+        self.directories = []
+        self.files = {}
+
+    def make_dir(self, path):
+        self.directories.append(self.name(path))
+        return True
+
+    def write_file(self, path, text):
+        self.files[self.name(path)] = text.encode('utf-8')
+
+    def total_bytes(self):
+        return sum(len(data) for data in self.files.values())
+
+class _ArchiveFileWriter(OutputWriter):
+    # Archives are written next to their final name and renamed into place when complete
+
+    def __init__(self, archive_path, base_dir):
+        super().__init__(base_dir)
+        self.archive_path = archive_path
+        self.tmp_path = f"{archive_path}.{os.getpid()}.tmp"
+        self.mtime = time.time()
+
+    def close(self):
+        self._close_archive()
+        os.replace(self.tmp_path, self.archive_path)
+
+    def abort(self):
+        try:
+            self._close_archive()
+        finally:
+            try:
+                os.remove(self.tmp_path)
+            except FileNotFoundError:
+                pass
+
+class TarArchiveWriter(_ArchiveFileWriter):
+    """
+    Streams the output into a tar archive, compressed according to its extension
+    (.tar.gz/.tgz, .tar.bz2, .tar.xz).
     """
-    Recursively creates directories and Markdown files based on the hierarchical structure.
+    COMPRESSION = (('.tar.gz', 'gz'), ('.tgz', 'gz'), ('.tar.bz2', 'bz2'), ('.tar.xz', 'xz'))
+
+    def __init__(self, archive_path, base_dir):
+        super().__init__(archive_path, base_dir)
+        compression = next((mode for suffix, mode in self.COMPRESSION if archive_path.endswith(suffix)), '')
+        self.archive = tarfile.open(self.tmp_path, 'w|' + compression)
+
+    def _info(self, path, kind, mode):
+        info = tarfile.TarInfo(self.name(path))
+        info.type = kind
+        info.mode = mode
+        info.mtime = self.mtime
+        return info
+
+    def make_dir(self, path):
+        self.archive.addfile(self._info(path, tarfile.DIRTYPE, 0o755))
+        return True
+
+    def write_file(self, path, text):
+        data = text.encode('utf-8')
+        info = self._info(path, tarfile.REGTYPE, 0o644)
+        info.size = len(data)
+        self.archive.addfile(info, io.BytesIO(data))
+
+    def _close_archive(self):
+        self.archive.close()
+
+class ZipArchiveWriter(_ArchiveFileWriter):
+    """
+    Streams the output into a deflate-compressed zip archive.
+    """
+
+    def __init__(self, archive_path, base_dir):
+        super().__init__(archive_path, base_dir)
+        self.archive = zipfile.ZipFile(self.tmp_path, 'w', zipfile.ZIP_DEFLATED)
+        self.date_time = time.localtime(self.mtime)[:6]
+
+    def make_dir(self, path):
+        info = zipfile.ZipInfo(self.name(path) + '/', self.date_time)
+        info.external_attr = (stat.S_IFDIR | 0o755) << 16 | 0x10  # MS-DOS directory flag
+        self.archive.writestr(info, b'')
+        return True
+
+    def write_file(self, path, text):
+        info = zipfile.ZipInfo(self.name(path), self.date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = (stat.S_IFREG | 0o644) << 16
+        self.archive.writestr(info, text.encode('utf-8'))
+
+    def _close_archive(self):
+        self.archive.close()
+
+class GitFastImportWriter(OutputWriter):
+    """
+    Commits the output to a branch of a local git repository through git fast-import.
+
+    The commit replaces the whole tree of the branch, or only prefix within it,
+    and has the previous tip as its parent. Files go straight into git's object
+    store; nothing is written to the work tree. Git does not store folders, so
+    empty ones (see allow_empty_folders) are not kept. If the run fails, the
+    import is killed before the branch is updated.
+    """
+
+    def __init__(self, repo_dir, base_dir, branch='docs', prefix='', message='Update generated docs'):
+        super().__init__(base_dir)
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        ref = f"refs/heads/{branch}"
+
+        def git(*args):
+            return subprocess.run(['git', '-C', repo_dir, *args], capture_output=True, text=True)
+
+        ident = git('var', 'GIT_COMMITTER_IDENT')
+        if ident.returncode != 0:
+            raise RuntimeError(f"Not a usable git repository: {repo_dir}: {ident.stderr.strip()}")
+        parent = git('rev-parse', '--verify', '--quiet', ref).returncode == 0
+
+        self.process = subprocess.Popen(['git', '-C', repo_dir, 'fast-import', '--quiet'],
+                                        stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        self.stream = self.process.stdin
+        message = message.encode('utf-8')
+        header = [f"commit {ref}\n", f"committer {ident.stdout.strip()}\n", f"data {len(message)}\n"]
+        self.stream.write(''.join(header).encode('utf-8') + message + b'\n')
+        if parent:
+            self.stream.write(f"from {ref}^0\n".encode('utf-8'))
+        if self.prefix:
+            self.stream.write(b'D ' + self._quote(self.prefix[:-1]) + b'\n')
+        else:
+            self.stream.write(b'deleteall\n')
+
+    @staticmethod
+    def _quote(path):
+        # fast-import only needs C-style quoting for paths starting with '"' or holding a newline
+        if path.startswith('"') or '\n' in path:
+            path = '"' + path.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        return path.encode('utf-8')
+
+    def write_file(self, path, text):
+        data = text.encode('utf-8')
+        self.stream.write(b'M 100644 inline ' + self._quote(self.prefix + self.name(path)) + b'\n')
+        self.stream.write(f"data {len(data)}\n".encode('utf-8') + data + b'\n')
+
+    def close(self):
+        self.stream.write(b'\ndone\n')
+        _, errors = self.process.communicate()
+        if self.process.returncode != 0:
+            raise RuntimeError(f"git fast-import failed: {errors.decode('utf-8', 'replace').strip()}")
+
+    def abort(self):
+        self.process.kill()
+        self.process.communicate()
+
+OUTPUT_FORMATS = ('dir', 'tar', 'zip', 'git')
+
+def open_output_writer(output_format, output_path, git_branch='docs', git_prefix='', git_message='Update generated docs'):
+    """
+    Returns the OutputWriter for an output format other than 'dir'; output_path is
+    the archive file, or the repository for 'git', and the root of the planned paths.
+    """
+    if output_format == 'tar':
+        return TarArchiveWriter(output_path, output_path)
+    if output_format == 'zip':
+        return ZipArchiveWriter(output_path, output_path)
+    if output_format == 'git':
+        return GitFastImportWriter(output_path, output_path, git_branch, git_prefix, git_message)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+def write_plan(plan, jobs=1, manifest=None, reuse_file=None, metrics=None, writer=None):
+    """
+    Executes a path plan: creates its directories in order and writes its files.
+
+    The plan already holds every final path, so no existence checks are made.
 
     Args:
-        node (dict): The current node in the hierarchical structure.
+        plan (iterable): PlanEntry objects as yielded by iter_path_plan.
+        jobs (int): Number of file writer threads. Directories are always created
+            in order on the calling thread; with jobs > 1 file bodies are written
+            by a bounded pool. The output is identical either way.
+        manifest (OutputManifest, optional): Records every file; in incremental
+            mode, files whose rendered text is unchanged are skipped.
+        reuse_file (function, optional): Called with the path of an unchanged file
+            instead of skipping it; returns False if the file must be written after all.
+        metrics (RunMetrics, optional): Receives render, hash, mkdir and write times and
+            counters. With jobs > 1 the write time is the time spent handing files to the pool.
+        writer (OutputWriter, optional): Receives the directories and files; defaults to
+            a DiskWriter with the given jobs, which is ignored otherwise.
+    """
+    metrics = metrics or NULL_METRICS
+    if writer is not None:
+        _write_plan(plan, writer, manifest, reuse_file, metrics)
+    else:
+        with DiskWriter(jobs) as disk_writer:
+            _write_plan(plan, disk_writer, manifest, reuse_file, metrics)
+
+def make_dir(path):
+    """
+    Creates a directory whose parent exists; returns False if it was already there.
+    """
+    try:
+        os.mkdir(path)
+        return True
+    except FileExistsError:
+        return False
+
+def _write_plan(plan, writer, manifest, reuse_file, metrics):
+    make_dir, write_file = writer.make_dir, writer.write_file
+    for entry in plan:
+        if entry.kind == 'dir':
+            with metrics.phase('mkdir'):
+                if make_dir(entry.path):
+                    metrics.count('directories_created')
+            continue
+
+        if entry.suffixed:
+            metrics.count('collisions_resolved')
+        if entry.kind != 'file':
+            continue
+
+        with metrics.phase('render'):
+            text = entry.render()
+        if manifest is not None:
+            with metrics.phase('hash'):
+                needs_write = manifest.needs_write(entry.path, text)
+            if not needs_write and (reuse_file is None or reuse_file(entry.path)):
+                continue
+        with metrics.phase('write'):
+            write_file(entry.path, text)
+        metrics.count('files_written')
+        if metrics is not NULL_METRICS:
+            metrics.count('bytes_written', len(text.encode('utf-8')))
+
+def apply_outline_diff(diff, old_plan, new_plan, manifest):
+    """
+    Brings an output directory generated from the old outline in line with the new one.
+
+    Only files of nodes the diff reports as changed, or whose planned path moved
+    (a rename elsewhere can shift collision suffixes), are rendered and written.
+    Directories are only created if the old plan lacked them, and files the new
+    plan no longer contains are deleted. The filesystem is never scanned.
+
+    Args:
+        diff (OutlineDiff): The result of diff_outlines on the two outlines.
+        old_plan (iterable): PlanEntry objects of the old outline.
+        new_plan (iterable): PlanEntry objects of the new outline, for the same base directory.
+        manifest (OutputManifest): The manifest of the output directory, loaded in incremental mode.
+
+    Returns:
+        dict: Counts of added, changed, unchanged and removed files.
+    """
+    old_files = {}
+    old_directories = set()
+    for entry in old_plan:
+        if entry.kind == 'dir':
+            old_directories.add(entry.path)
+        elif entry.kind == 'file':
+            old_files[entry.node] = entry.path
+    old_paths = set(old_files.values())
+
+    touched = diff.touched()
+    new_paths = set()
+    new_directories = set()
+    for entry in new_plan:
+        if entry.kind == 'dir':
+            new_directories.add(entry.path)
+            if entry.path not in old_directories:
+                try:
+                    os.mkdir(entry.path)
+                except FileExistsError:
+                    pass
+        elif entry.kind == 'file':
+            new_paths.add(entry.path)
+            old_node = diff.matches.get(entry.node)
+            if (entry.node not in touched and old_node is not None and old_files.get(old_node) == entry.path
+                    and manifest.relpath(entry.path) in manifest.previous):
+                manifest.keep(entry.path)
+                continue
+            text = entry.render()
+            if manifest.needs_write(entry.path, text):
+                write_text_file(entry.path, text)
+
+    removed = {manifest.relpath(path) for path in old_paths - new_paths}
+    keep = {os.path.normpath(path) for path in new_directories}
+    prune_stale_outputs(manifest.base_dir, sorted(removed.union(manifest.removed)), keep=keep,
+                        written=manifest.files)
+    return manifest.summary()
+
+RENAME_EXCHANGE = 2
+AT_FDCWD = -100
+
+def exchange_paths(path_a, path_b):
+    """
+    Atomically swaps two directory entries with renameat2(RENAME_EXCHANGE).
+
+    Returns False without touching either path where the call is unavailable:
+    on other platforms, with a C library that lacks it, or on a filesystem that
+    does not support the flag.
+    """
+    if not sys.platform.startswith('linux'):
+        return False
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    renameat2 = getattr(libc, 'renameat2', None)
+    if renameat2 is None:
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    if renameat2(AT_FDCWD, os.fsencode(path_a), AT_FDCWD, os.fsencode(path_b), RENAME_EXCHANGE) == 0:
+        return True
+    err = ctypes.get_errno()
+    if err in (errno.ENOSYS, errno.EINVAL):
+        return False
+    raise OSError(err, os.strerror(err), path_a, None, path_b)
+
+def untracked_outputs(base_dir, known_files):
+    """
+    Lists the paths under base_dir, relative and with '/' separators, that are
+    neither in known_files nor the manifest itself.
+    """
+    untracked = []
+    for dirpath, dirnames, filenames in os.walk(base_dir):
+        rel_dir = os.path.relpath(dirpath, base_dir).replace(os.sep, '/')
+        prefix = '' if rel_dir == '.' else rel_dir + '/'
+        # os.walk does not descend into symlinked folders; they are untracked as a whole
+        for name in dirnames:
+            if os.path.islink(os.path.join(dirpath, name)):
+                untracked.append(prefix + name)
+        for name in filenames:
+            rel = prefix + name
+            if rel != OutputManifest.FILE_NAME and rel not in known_files:
+                untracked.append(rel)
+    return sorted(untracked)
+
+@contextmanager
+def staged_output_dir(base_dir, known_files=()):
+    """
+    Yields a sibling staging directory and swaps it in place of base_dir on success.
+
+    If the body raises, the staging directory is removed and base_dir is left as it
+    was. On Linux the swap is a single renameat2(RENAME_EXCHANGE), so base_dir always
+    names a complete generation. Elsewhere it is two renames: the live tree is moved
+    aside and the staged one moved in, so for the instant between them base_dir is
+    missing, but never partial.
+
+    Because the whole directory is replaced, base_dir must only hold files listed in
+    known_files (the previous manifest); anything else is refused before the run starts.
+    """
+    base_dir = os.path.abspath(base_dir)
+    parent, name = os.path.split(base_dir)
+    os.makedirs(parent, exist_ok=True)
+
+    if os.path.isdir(base_dir):
+        untracked = untracked_outputs(base_dir, known_files)
+        if untracked:
+            shown = ', '.join(untracked[:10]) + (f" and {len(untracked) - 10} more" if len(untracked) > 10 else '')
+            raise ValueError(f"Refusing staged output into {base_dir}: the manifest does not cover {shown}. "
+                             f"Move them out of the output directory or run without --staged")
+
+    staging_dir = tempfile.mkdtemp(prefix=f'.{name}.staging-', dir=parent)
+    try:
+        # mkdtemp creates a private directory; give it the permissions of the tree it replaces
+        if os.path.isdir(base_dir):
+            os.chmod(staging_dir, stat.S_IMODE(os.stat(base_dir).st_mode))
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(staging_dir, 0o777 & ~umask)
+        yield staging_dir
+    except BaseException:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    if not os.path.exists(base_dir):
+        os.rename(staging_dir, base_dir)
+        return
+
+    if exchange_paths(staging_dir, base_dir):
+        shutil.rmtree(staging_dir, ignore_errors=True)  # Now holds the previous generation
+        return
+
+    retired_dir = tempfile.mkdtemp(prefix=f'.{name}.old-', dir=parent)
+    retired_path = os.path.join(retired_dir, name)
+    os.rename(base_dir, retired_path)
+    try:
+        os.rename(staging_dir, base_dir)
+    except OSError:
+        os.rename(retired_path, base_dir)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    finally:
+        if os.path.exists(base_dir):
+            shutil.rmtree(retired_dir, ignore_errors=True)
+
+def link_from(source_dir, manifest):
+    """
+    Returns a reuse_file callback for write_plan that hard-links unchanged files from source_dir.
+    """
+    def reuse_file(path):
+        rel = manifest.relpath(path)
+        try:
+            os.link(os.path.join(source_dir, *rel.split('/')), path)
+        except OSError:
+            return False
+        return True
+    return reuse_file
+
+def create_structure(node, parent_path, id_to_path_map, sanitize_function, allow_empty_folders,
+                     resolve_links=False, writer=None):
+    """
+    Creates directories and Markdown files based on the hierarchical structure.
+
+    Args:
+        node (OutlineNode or dict): The current node in the hierarchical structure.
         parent_path (str): The path to the parent directory.
         id_to_path_map (dict): A mapping from unique IDs to paths.
         sanitize_function (function): The function to use for sanitizing names.
         allow_empty_folders (bool): Whether to allow empty folders.
+        resolve_links (bool): Rewrite [[target]] references in body lines, see LinkResolver.
+        writer (OutputWriter, optional): Receives the output instead of parent_path.
     """
-    for child in node.get('Children', []):
-        content = child['Content']
-        content_FULLLINE = child['FULLLINE']
-        sanitized_name = sanitize_function(content)
-        current_path = os.path.join(parent_path, sanitized_name)
+    if isinstance(node, dict):
+        node = OutlineNode.from_dict(node)
 
-        # Normalize paths to ensure consistent comparison
-        normalized_parent_path = os.path.normpath(parent_path)
-        normalized_current_path = os.path.normpath(current_path)
+    if writer is None:
+        os.makedirs(parent_path, exist_ok=True)
+    plan = iter_path_plan(iter_tree_events(node), parent_path, sanitize_function, allow_empty_folders, id_to_path_map)
+    if resolve_links:
+        plan = LinkResolver().resolve(plan, parent_path)
+    write_plan(plan, writer=writer)
 
-        # Ensure the path is within the intended directory
-        if not os.path.commonpath([normalized_current_path, normalized_parent_path]) == normalized_parent_path:
-            raise ValueError(f"Invalid path detected: {normalized_current_path} is not within {normalized_parent_path}")
+def process_outline(input_file, base_dir, sanitize_function=sanitize_and_clean_name, allow_empty_folders=False,
+                    jobs=1, id_scheme='path', incremental=False, prune=False, staged=False, metrics=None,
+                    cache=None, sidebar=None, resolve_links=False, writer=None):
+    """
+    Converts one outline file into a directory of Markdown files.
 
-        # Handle name conflicts by appending a unique identifier
-        if os.path.exists(normalized_current_path):
-            sanitized_name += '_' + child['UniqueID'][:6]
-            normalized_current_path = os.path.join(normalized_parent_path, sanitized_name)
-
-        # Store the mapping from unique ID to path
-        id_to_path_map[child['UniqueID']] = normalized_current_path
-
-        # Prepare the front matter with proper escaping
-        title_line = escape_title(content_FULLLINE)
-        front_matter = f"---\n{title_line}---\n\n"
-
-        if child['Children']:
-            # Create a directory for nodes with children
-            os.makedirs(normalized_current_path, exist_ok=True)
-            # Create an index.md file for the directory
-            md_file_path = os.path.join(normalized_current_path, 'index.md')
-            write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter)
-            # Recursively create structure for child nodes
-            create_structure(child, normalized_current_path, id_to_path_map, sanitize_function, allow_empty_folders)
-        elif allow_empty_folders:
-            # Check if any siblings have children
-            siblings_have_children = any(sibling['Children'] for sibling in node['Children'] if sibling != child)
-
-            if siblings_have_children:
-                # Create a directory with index.md if any siblings have children
-                os.makedirs(normalized_current_path, exist_ok=True)
-                md_file_path = os.path.join(normalized_current_path, 'index.md')
-                write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter)
+    Args:
+        input_file (str): Path to the input Markdown file.
+        base_dir (str): Path to the output base directory.
+        sanitize_function (function): The function to use for sanitizing names.
+        allow_empty_folders (bool): Whether to allow empty folders.
+        jobs (int): Number of file writer threads.
+        id_scheme (str): The node ID scheme, see iter_outline_events.
+        incremental (bool): Skip files whose content did not change since the last run.
+        prune (bool): Delete outputs of the last run that are no longer produced.
+        staged (bool): Build the new tree next to base_dir and swap it in when complete.
+            Unchanged files are hard-linked from the previous generation.
+        metrics (RunMetrics, optional): Receives per-phase timings and counters.
+        cache (PlanCache, optional): Reuses the plan of an identical earlier input.
+        sidebar (DocusaurusSidebar, optional): Adds _category_.json files and writes
+            sidebars.js from the plan, as configured on it.
+        resolve_links (bool): Rewrite [[target]] references in body lines into relative
+            links. The whole plan is then held in memory before writing starts.
+        writer (OutputWriter, optional): Receives the output instead of base_dir, which
+            then only names the root of the planned paths. No manifest is kept, so
+            incremental, prune and staged do not apply.
+
+    Without incremental, prune or staged no manifest is kept either, so memory stays
+    bounded by the nesting depth. Any manifest in base_dir is then deleted, so a
+    later incremental run rewrites every file once instead of trusting stale hashes.
+
+    Returns:
+        dict: The number of files written; with a manifest also counts of added,
+        changed, unchanged and removed files, plus pruned files and folders, and
+        with resolve_links the number of broken references.
+    """
+    metrics = metrics or NULL_METRICS
+    resolver = LinkResolver() if resolve_links else None
+
+    def generate(target_dir, manifest, reuse_file=None):
+        def emit(plan):
+            if resolver is not None:
+                # References can point forward, so every path must be known first
+                with metrics.phase('links'):
+                    plan = resolver.resolve(plan, target_dir)
+            if sidebar is not None:
+                plan = sidebar.process(plan, target_dir)
+            with metrics.phase('emit'):
+                write_plan(plan, jobs, manifest, reuse_file, metrics, writer)
+
+        if cache is None:
+            source = open(input_file, 'r', encoding='utf-8')
+        else:
+            with metrics.phase('cache'):
+                with open(input_file, 'rb') as f:
+                    data = f.read()
+                key = cache.key(data, sanitize_function, allow_empty_folders, id_scheme)
+                cached_plan = cache.load(key, target_dir)
+            if cached_plan is not None:
+                # A hit skips parsing and planning altogether
+                metrics.count('cache_hits')
+                emit(cached_plan)
+            else:
+                source = io.StringIO(data.decode('utf-8'), newline=None)
+
+        if cache is None or cached_plan is None:
+            # Stream the input file, writing each entry as soon as its indentation closes
+            with source as f:
+                events = metrics.track_events(iter_outline_events(f, id_scheme))
+                plan = iter_path_plan(events, target_dir, metrics.wrap('sanitize', sanitize_function),
+                                      allow_empty_folders)
+                if cache is not None:
+                    plan = cache.record(key, target_dir, plan)
+                emit(metrics.timed('plan', plan))
+        with metrics.phase('manifest'):
+            manifest.save()
+        if sidebar is not None:
+            sidebar.save()
+
+    summary = {'pruned_files': 0, 'pruned_folders': 0}
+    if resolver is not None:
+        summary['broken_links'] = 0
+
+    if writer is not None or not (incremental or prune or staged):
+        if writer is None:
+            # Deleted before anything is written, so an interrupted run cannot leave stale hashes
+            os.makedirs(base_dir, exist_ok=True)
+            try:
+                os.remove(os.path.join(base_dir, OutputManifest.FILE_NAME))
+            except FileNotFoundError:
+                pass
+        counter = WriteCounter()
+        generate(base_dir, counter)
+        summary.update(counter.summary())
+        if resolver is not None:
+            summary['broken_links'] = len(resolver.broken)
+        return summary
+
+    manifest = OutputManifest.load(base_dir, incremental)
+
+    if staged:
+        # A staged generation only ever contains planned files, so nothing needs pruning
+        with staged_output_dir(base_dir, manifest.previous) as staging_dir:
+            manifest = OutputManifest(staging_dir, manifest.previous, incremental=True)
+            generate(staging_dir, manifest, link_from(os.path.abspath(base_dir), manifest))
+        summary.update(manifest.summary())
+        if resolver is not None:
+            summary['broken_links'] = len(resolver.broken)
+        return summary
+
+    os.makedirs(base_dir, exist_ok=True)
+    generate(base_dir, manifest)
+
+    if prune:
+        with metrics.phase('prune'):
+            pruned = prune_stale_outputs(base_dir, manifest.removed, written=manifest.files)
+        summary['pruned_files'], summary['pruned_folders'] = pruned
+
+    summary.update(manifest.summary())
+    if resolver is not None:
+        summary['broken_links'] = len(resolver.broken)
+    return summary
+
+def plan_outline(input_file, base_dir, sanitize_function=sanitize_and_clean_name, allow_empty_folders=False,
+                 id_scheme='path', plan_out=None, sidebar=None, resolve_links=False):
+    """
+    Parses and plans an outline without writing anything or looking at base_dir.
+
+    Args:
+        input_file (str): Path to the input Markdown file.
+        base_dir (str): Path to the output base directory; only used to build paths.
+        sanitize_function (function): The function to use for sanitizing names.
+        allow_empty_folders (bool): Whether to allow empty folders.
+        id_scheme (str): The node ID scheme, see iter_outline_events.
+        plan_out (file, optional): Receives every plan entry as one JSON object per line:
+            kind ('dir', 'file' or 'skip'), path relative to base_dir with '/'
+            separators, node ID, title line, and the suffixed and promoted flags.
+            Files whose text is generated or has resolved links also carry their
+            text. With a sidebars file, a last 'sidebars' object holds its path
+            as given and its text.
+        sidebar (DocusaurusSidebar, optional): Plans the _category_.json files as a real
+            run would; sidebars.js is reported but not written.
+        resolve_links (bool): Resolve [[target]] references as a real run would.
+
+    Returns:
+        dict: Counts of directories, files, skipped leaves, suffixed names and promoted
+        leaves, and with resolve_links the number of broken references.
+    """
+    counts = {'dirs': 0, 'files': 0, 'skipped': 0, 'suffixed': 0, 'promoted': 0}
+    kind_counts = {'dir': 'dirs', 'file': 'files', 'skip': 'skipped'}
+    base_dir = os.path.normpath(base_dir)
+    cut = len(base_dir if base_dir.endswith(os.sep) else base_dir + os.sep)
+    encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    lines = []
+    resolver = LinkResolver() if resolve_links else None
+
+    with open(input_file, 'r', encoding='utf-8') as f:
+        plan = iter_path_plan(iter_outline_events(f, id_scheme), base_dir, sanitize_function, allow_empty_folders)
+        if resolver is not None:
+            plan = resolver.resolve(plan, base_dir)
+        if sidebar is not None:
+            plan = sidebar.process(plan, base_dir)
+        for entry in plan:
+            counts[kind_counts[entry.kind]] += 1
+            # Each node counts once: a folder by its 'dir' entry, not its index.md or _category_.json
+            if entry.suffixed and (entry.kind != 'file' or entry.path == entry.node_path + '.md'):
+                counts['suffixed'] += 1
+            if entry.promoted and entry.kind == 'dir':
+                counts['promoted'] += 1
+            if plan_out is None:
+                continue
+            record = {
+                'kind': entry.kind,
+                'path': entry.path[cut:].replace(os.sep, '/'),
+                'id': entry.node.unique_id,
+                'title': entry.node.full_line,
+                'suffixed': entry.suffixed,
+                'promoted': entry.promoted,
+            }
+            if isinstance(entry, RenderedEntry):
+                record['text'] = entry.text
+            lines.append(encode(record))
+            # Written in chunks, so the plan streams out without one write per line
+            if len(lines) >= 4096:
+                lines.append('')
+                plan_out.write('\n'.join(lines))
+                lines = []
+
+    if plan_out is not None and sidebar is not None and sidebar.sidebars_file:
+        lines.append(encode({'kind': 'sidebars', 'path': sidebar.sidebars_file, 'id': None, 'title': None,
+                             'suffixed': False, 'promoted': False, 'text': sidebar.render()}))
+    if plan_out is not None and lines:
+        lines.append('')
+        plan_out.write('\n'.join(lines))
+    if resolver is not None:
+        counts['broken_links'] = len(resolver.broken)
+    return counts
+
+class WatchState:
+    """
+    What watch mode remembers between edits of the outline.
+
+    signatures maps each written file to the (title line, body lines) it was
+    rendered from, so files of untouched nodes are neither rendered nor hashed
+    again; directories holds the folders known to exist. If applying a plan
+    fails, files it already wrote are marked as unknown, so the next plan writes
+    them again even if it reverts the edit.
+    """
+
+    def __init__(self, base_dir):
+        self.manifest = OutputManifest.load(base_dir, incremental=True)
+        self.signatures = {}
+        self.directories = set()
+
+    def apply(self, plan):
+        """
+        Brings the output directory in line with a new plan, touching only what changed.
+
+        Returns:
+            dict: Counts of added, changed, unchanged and removed files.
+        """
+        previous = self.manifest
+        manifest = OutputManifest(previous.base_dir, previous.files, incremental=True)
+        signatures = {}
+        directories = set()
+
+        try:
+            for entry in plan:
+                if entry.kind == 'dir':
+                    if entry.path not in self.directories:
+                        try:
+                            os.mkdir(entry.path)
+                        except FileExistsError:
+                            pass
+                    directories.add(entry.path)
+                elif entry.kind == 'file':
+                    signature = (entry.node.full_line, tuple(entry.node.body_lines))
+                    signatures[entry.path] = signature
+                    if self.signatures.get(entry.path) == signature:
+                        manifest.keep(entry.path)
+                        continue
+                    text = entry.render()
+                    if manifest.needs_write(entry.path, text):
+                        write_text_file(entry.path, text)
+
+            prune_stale_outputs(manifest.base_dir, manifest.removed, written=manifest.files)
+        except BaseException:
+            # Anything recorded with a new hash may be on disk already, half written or not at
+            # all; an empty hash never matches, so the next pass rewrites it. Signatures would
+            # skip that comparison, so they are dropped and rebuilt by the next pass.
+            for rel, digest in manifest.files.items():
+                if previous.files.get(rel) != digest:
+                    previous.files[rel] = ''
+            self.signatures = {}
+            raise
+        self.manifest, self.signatures, self.directories = manifest, signatures, directories
+        return manifest.summary()
+
+def watch_outline(input_file, base_dir, sanitize_function=sanitize_and_clean_name, allow_empty_folders=False,
+                  id_scheme='path', interval=0.5, debounce=0.3):
+    """
+    Regenerates base_dir whenever input_file is saved, until interrupted.
+
+    The input is polled for changes in modification time or size. A change is only
+    acted on once the file has been stable for the debounce period, so editors that
+    save in several steps trigger a single rebuild. Each rebuild reparses the
+    outline, plans it and applies only the difference to the output directory; the
+    sanitizer memo and the per-file state stay warm between edits.
+    """
+    os.makedirs(base_dir, exist_ok=True)
+    state = WatchState(base_dir)
+    last_seen = None
+
+    def file_signature():
+        try:
+            st = os.stat(input_file)
+        except FileNotFoundError:
+            return None  # Some editors save by replacing the file
+        return st.st_mtime_ns, st.st_size
+
+    logging.info(f"Watching {input_file} (Ctrl+C to stop)...")
+    try:
+        while True:
+            current = file_signature()
+            if current is not None and current != last_seen:
+                time.sleep(debounce)
+                if file_signature() != current:
+                    continue  # Still being written
+                last_seen = current
+
+                started = time.perf_counter()
+                try:
+                    with open(input_file, 'r', encoding='utf-8') as f:
+                        plan = iter_path_plan(iter_outline_events(f, id_scheme), base_dir, sanitize_function,
+                                              allow_empty_folders)
+                        counts = state.apply(plan)
+                    state.manifest.save()
+                except Exception as e:
+                    logging.error(f"An error occurred during processing: {str(e)}")
+                else:
+                    logging.info(f"Regenerated in {time.perf_counter() - started:.3f}s: {counts['added']} added, "
+                                 f"{counts['changed']} changed, {counts['removed']} removed")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        logging.info("Stopped watching.")
+
+def read_batch_pairs(pairs_file):
+    """
+    Reads (input_file, output_dir) pairs, one per line separated by a tab.
+
+    Blank lines and lines starting with '#' are ignored. Two lines naming the same
+    output directory are refused, since their jobs would overwrite each other.
+    """
+    pairs = []
+    outputs = {}
+    with open(pairs_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            parts = line.split('\t')
+            if len(parts) != 2:
+                raise ValueError(f"{pairs_file}:{line_number}: expected 'input<TAB>output_dir', got {line!r}")
+            input_file, output_dir = parts[0].strip(), parts[1].strip()
+            key = os.path.normcase(os.path.abspath(output_dir))
+            if key in outputs:
+                raise ValueError(f"{pairs_file}:{line_number}: {output_dir} is already the output of line "
+                                 f"{outputs[key]}")
+            outputs[key] = line_number
+            pairs.append((input_file, output_dir))
+    return pairs
+
+def glob_batch_pairs(pattern, output_root):
+    """
+    Pairs every file matching pattern with output_root/<file name without extension>.
+    """
+    pairs = []
+    outputs = {}
+    for input_file in sorted(glob.glob(pattern, recursive=True)):
+        if not os.path.isfile(input_file):
+            continue
+        output_dir = os.path.join(output_root, os.path.splitext(os.path.basename(input_file))[0])
+        key = os.path.normcase(os.path.abspath(output_dir))
+        if key in outputs:
+            raise ValueError(f"{input_file} and {outputs[key]} would both be written to {output_dir}")
+        outputs[key] = input_file
+        pairs.append((input_file, output_dir))
+    return pairs
+
+def run_batch_job(input_file, output_dir, options):
+    """
+    Converts one outline in a batch worker. Errors are returned instead of raised,
+    so one bad outline does not stop the others.
+    """
+    started = time.perf_counter()
+    try:
+        summary = process_outline(input_file, output_dir, **options)
+        return {'input': input_file, 'output': output_dir, 'ok': True, 'summary': summary,
+                'seconds': time.perf_counter() - started}
+    except Exception as e:
+        return {'input': input_file, 'output': output_dir, 'ok': False, 'error': f"{type(e).__name__}: {e}",
+                'seconds': time.perf_counter() - started}
+
+def run_batch(pairs, options, workers=None):
+    """
+    Converts many outlines on a process pool.
+
+    Args:
+        pairs (list): (input_file, output_dir) tuples.
+        options (dict): Keyword arguments for process_outline, shared by all jobs.
+        workers (int, optional): Number of worker processes; defaults to the CPU count.
+
+    Returns:
+        list: One result dict per pair, in the order of pairs.
+    """
+    results = [None] * len(pairs)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_batch_job, input_file, output_dir, options): index
+                   for index, (input_file, output_dir) in enumerate(pairs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                # The worker process itself died; the job never returned
+                input_file, output_dir = pairs[index]
+                results[index] = {'input': input_file, 'output': output_dir, 'ok': False,
+                                  'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
+            result = results[index]
+            if result['ok']:
+                logging.info(f"Done {result['input']} -> {result['output']} in {result['seconds']:.2f}s")
+            else:
+                logging.error(f"Failed {result['input']}: {result['error']}")
+    return results
+
+def add_cache_arguments(parser):
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='Keep parsed plans in DIR and reuse them when the same outline is converted again.')
+    parser.add_argument('--cache-max-size', type=float, default=256, metavar='MB',
+                        help='Evict the least recently used plans beyond this size (default: 256).')
+    parser.add_argument('--cache-max-age', type=float, default=30, metavar='DAYS',
+                        help='Evict plans unused for this many days (default: 30).')
+
+def plan_cache_from_args(args):
+    if not args.cache_dir:
+        return None
+    return PlanCache(args.cache_dir, int(args.cache_max_size * 2**20), args.cache_max_age * 86400)
+
+def batch_main(argv):
+    parser = argparse.ArgumentParser(prog='d2c2_cli.py batch',
+                                     description='Convert many outlines in one process pool.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--pairs', metavar='FILE', help='File with one "input<TAB>output_dir" pair per line.')
+    source.add_argument('--glob', metavar='PATTERN', help="Input files to convert, e.g. 'outlines/*.md'.")
+    parser.add_argument('--output-root', help='With --glob: each input is written to OUTPUT_ROOT/<name>.')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (default: CPU count).')
+    parser.add_argument('--remove-digits', action='store_true', help='Use alternative sanitization to remove digits.')
+    parser.add_argument('--allow-empty-folders', action='store_true', help='Allow the creation of empty folders.')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', help='File writer threads per outline (default: 1).')
+    parser.add_argument('--id-scheme', choices=ID_SCHEMES, default='path', help='Node ID scheme, see the main command.')
+    parser.add_argument('--incremental', action='store_true', help='Only rewrite files whose content changed.')
+    parser.add_argument('--prune', action='store_true', help='Delete stale files from the previous run.')
+    parser.add_argument('--staged', action='store_true', help='Swap each output directory in when complete.')
+    parser.add_argument('--resolve-links', action='store_true', help='Resolve [[target]] references in body lines.')
+    add_cache_arguments(parser)
+
+    args = parser.parse_args(argv)
+    if args.glob and not args.output_root:
+        parser.error('--glob requires --output-root')
+
+    try:
+        pairs = read_batch_pairs(args.pairs) if args.pairs else glob_batch_pairs(args.glob, args.output_root)
+    except ValueError as e:
+        parser.error(str(e))
+    if not pairs:
+        logging.warning("Nothing to convert")
+        return 0
+
+    options = {
+        'sanitize_function': alternative_sanitize_and_clean_name if args.remove_digits else sanitize_and_clean_name,
+        'allow_empty_folders': args.allow_empty_folders,
+        'jobs': max(1, args.jobs),
+        'id_scheme': args.id_scheme,
+        'incremental': args.incremental,
+        'prune': args.prune,
+        'staged': args.staged,
+        'cache': plan_cache_from_args(args),
+        'resolve_links': args.resolve_links,
+    }
+
+    started = time.perf_counter()
+    logging.info(f"Converting {len(pairs)} outlines...")
+    results = run_batch(pairs, options, args.workers)
+    elapsed = time.perf_counter() - started
+
+    succeeded = [result for result in results if result['ok']]
+    failed = [result for result in results if not result['ok']]
+    totals = {}
+    for result in succeeded:
+        for name, value in result['summary'].items():
+            totals[name] = totals.get(name, 0) + value
+
+    logging.info(f"Batch finished in {elapsed:.2f}s: {len(succeeded)} succeeded, {len(failed)} failed")
+    if 'added' in totals:
+        logging.info(f"Files: {totals['added']} added, {totals['changed']} changed, "
+                     f"{totals['unchanged']} unchanged, {totals['removed']} removed")
+    elif succeeded:
+        logging.info(f"Files: {totals['written']} written")
+    for result in failed:
+        logging.error(f"  {result['input']}: {result['error']}")
+    return 1 if failed else 0
+
+def diff_main(argv):
+    parser = argparse.ArgumentParser(prog='d2c2_cli.py diff',
+                                     description='Compare two outlines and list inserted, deleted, renamed, moved '
+                                                 'and body-changed entries.')
+    parser.add_argument('old_file', help='Path to the old outline.')
+    parser.add_argument('new_file', help='Path to the new outline.')
+    parser.add_argument('--remove-digits', action='store_true', help='Use alternative sanitization to remove digits.')
+    parser.add_argument('--allow-empty-folders', action='store_true', help='Allow the creation of empty folders.')
+    parser.add_argument('--id-scheme', choices=ID_SCHEMES, default='path', help='Node ID scheme, see the main command.')
+    parser.add_argument('--json', action='store_true', help='Print one JSON object per change instead of text.')
+    parser.add_argument('--apply', metavar='OUTPUT_DIR',
+                        help='Update OUTPUT_DIR, generated from the old outline, to match the new one.')
+
+    args = parser.parse_args(argv)
+    sanitize_function = alternative_sanitize_and_clean_name if args.remove_digits else sanitize_and_clean_name
+    base_dir = args.apply or ''
+
+    def parse_and_plan(input_file):
+        with open(input_file, 'r', encoding='utf-8') as f:
+            root = build_outline(f, args.id_scheme)
+        return root, list(iter_path_plan(iter_tree_events(root), base_dir, sanitize_function, args.allow_empty_folders))
+
+    try:
+        old_root, old_plan = parse_and_plan(args.old_file)
+        new_root, new_plan = parse_and_plan(args.new_file)
+    except FileNotFoundError as e:
+        logging.error(f"Input file not found: {e.filename}")
+        return 2
+
+    diff = diff_outlines(old_root, new_root)
+
+    if args.apply:
+        manifest = OutputManifest.load(args.apply, incremental=True)
+        counts = apply_outline_diff(diff, old_plan, new_plan, manifest)
+        manifest.save()
+        logging.info(f"Applied: {counts['added']} added, {counts['changed']} changed, "
+                     f"{counts['unchanged']} unchanged, {counts['removed']} removed")
+        return 0
+
+    old_paths = {entry.node: os.path.normpath(entry.node_path) for entry in old_plan}
+    new_paths = {entry.node: os.path.normpath(entry.node_path) for entry in new_plan}
+    changes = [('inserted', None, node) for node in diff.inserted]
+    changes += [('deleted', node, None) for node in diff.deleted]
+    for name in ('renamed', 'moved', 'body_changed'):
+        changes += [(name, old, new) for old, new in getattr(diff, name)]
+
+    for name, old, new in changes:
+        old_path = old_paths.get(old) if old is not None else None
+        new_path = new_paths.get(new) if new is not None else None
+        if args.json:
+            print(json.dumps({
+                'change': name,
+                'old': None if old is None else {'id': old.unique_id, 'title': old.content, 'path': old_path},
+                'new': None if new is None else {'id': new.unique_id, 'title': new.content, 'path': new_path},
+            }))
         else:
-                # Create a .md file if no siblings have children
-                md_file_path = f"{normalized_current_path}.md"
-                write_md_file(md_file_path, '', child.get('BodyLines', []), front_matter)
+            print(f"{name:12} {' -> '.join(path for path in (old_path, new_path) if path is not None)}")
 
+    counts = diff.counts()
+    logging.info(", ".join(f"{value} {name.replace('_', ' ')}" for name, value in counts.items()))
+    return 1 if diff else 0
+
+def log_metrics(metrics):
+    """
+    Logs a one-line-per-phase summary of a run's metrics.
+    """
+    logging.info(f"Wall time {metrics.wall_time:.3f}s"
+                 + (f", peak traced memory {metrics.peak_memory / 2**20:.1f} MiB" if metrics.trace_memory else ""))
+    for name, stats in sorted(metrics.phases.items(), key=lambda item: -item[1]['time']):
+        logging.info(f"  {name:10} {stats['time']:8.3f}s")
+    logging.info("  " + ", ".join(f"{name.replace('_', ' ')}: {value}" for name, value in metrics.counters.items()))
+
+COMMANDS = {
+    'batch': batch_main,
+    'diff': diff_main,
+}
 
 def main():
+    # Subcommands come first; anything else is the original 'input_file output_dir' form
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
     parser = argparse.ArgumentParser(description='Process a Markdown list into a structured directory of Markdown files.')
     parser.add_argument('input_file', help='Path to the input Markdown file.')
     parser.add_argument('output_dir', help='Path to the output base directory.')
     parser.add_argument('--remove-digits', action='store_true', help='Use alternative sanitization to remove digits.')
     parser.add_argument('--allow-empty-folders', action='store_true', help='Allow the creation of empty folders.')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', help='Number of threads writing files (default: 1).')
+    parser.add_argument('--id-scheme', choices=ID_SCHEMES, default='path',
+                        help="Node IDs used for collision suffixes: 'path' stays stable across edits (default), "
+                             "'line' is the original line-number based scheme.")
+    parser.add_argument('--incremental', action='store_true', help='Only rewrite files whose content changed since the last run.')
+    parser.add_argument('--prune', action='store_true',
+                        help='Delete files from the previous run that are no longer in the outline, and folders left empty.')
+    parser.add_argument('--staged', action='store_true',
+                        help='Build the output next to the output directory and swap it in only when complete.')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and apply every saved change of the input file to the output directory.')
+    parser.add_argument('--watch-interval', type=float, default=0.5, metavar='SECONDS',
+                        help='How often --watch checks the input file (default: 0.5).')
+    parser.add_argument('--metrics-json', metavar='PATH',
+                        help='Write per-phase wall time, peak memory (tracemalloc) and counters to this JSON file.')
+    parser.add_argument('--profile', metavar='PATH', help='Dump cProfile statistics of the run to this file.')
+    add_cache_arguments(parser)
+    parser.add_argument('--resolve-links', action='store_true',
+                        help='Turn [[Title]] and [[path/to/entry]] references in body lines into relative links.')
+    parser.add_argument('--categories', action='store_true',
+                        help='Write a Docusaurus _category_.json (label and position) into every folder.')
+    parser.add_argument('--sidebars', metavar='PATH', help='Write a complete Docusaurus sidebars.js to PATH.')
+    parser.add_argument('--docs-dir', metavar='DIR',
+                        help='The Docusaurus docs folder containing the output directory, for doc IDs in '
+                             '--sidebars (default: the output directory).')
+    parser.add_argument('--output-format', choices=OUTPUT_FORMATS, default='dir',
+                        help="'dir' writes files (default); 'tar' and 'zip' stream an archive to output_dir "
+                             "(.tar.gz, .tgz, .tar.bz2 and .tar.xz are compressed); 'git' commits to the "
+                             "repository at output_dir without touching its work tree.")
+    parser.add_argument('--git-branch', default='docs', help="Branch to commit to with --output-format git (default: docs).")
+    parser.add_argument('--git-prefix', default='', metavar='PATH',
+                        help='Folder within the branch to replace (default: the whole tree).')
+    parser.add_argument('--git-message', metavar='TEXT', help='Commit message for --output-format git.')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only parse and plan: report what would be written, without touching the output directory.')
+    parser.add_argument('--plan-json', metavar='PATH',
+                        help="With --dry-run, stream every planned folder and file as JSON lines to PATH ('-' for stdout).")
 
     args = parser.parse_args()
 
     input_file = args.input_file
     base_dir = args.output_dir
-    use_alternative_sanitization = args.remove_digits
-    allow_empty_folders = args.allow_empty_folders
 
-    try:
-        logging.info("Starting processing...")
-        os.makedirs(base_dir, exist_ok=True)
+    # Select the sanitization function based on the argument
+    if args.remove_digits:
+        sanitize_function = alternative_sanitize_and_clean_name
+    else:
+        sanitize_function = sanitize_and_clean_name
 
-        # Read the input file content directly
-        with open(input_file, 'r', encoding='utf-8') as f:
-            list_content = [line.rstrip() for line in f]
+    sidebar = None
+    if args.categories or args.sidebars:
+        id_prefix = os.path.relpath(base_dir, args.docs_dir) if args.docs_dir else ''
+        if id_prefix.split(os.sep)[0] == os.pardir:
+            parser.error('the output directory must be inside --docs-dir')
+        sidebar = DocusaurusSidebar(args.categories, args.sidebars, id_prefix)
 
-        # Build the hierarchy tree
-        root = categorize_lines(list_content)
+    if args.plan_json and not args.dry_run:
+        parser.error('--plan-json requires --dry-run')
+    if args.dry_run:
+        try:
+            if args.plan_json in (None, '-'):
+                counts = plan_outline(input_file, base_dir, sanitize_function, args.allow_empty_folders,
+                                      args.id_scheme, sys.stdout if args.plan_json else None, sidebar,
+                                      args.resolve_links)
+            else:
+                with open(args.plan_json, 'w', encoding='utf-8') as plan_out:
+                    counts = plan_outline(input_file, base_dir, sanitize_function, args.allow_empty_folders,
+                                          args.id_scheme, plan_out, sidebar, args.resolve_links)
+        except FileNotFoundError:
+            logging.error(f"Error: Input file not found at {input_file}")
+            return
+        except Exception as e:
+            logging.error(f"An error occurred during planning: {str(e)}")
+            return
+        logging.info(f"Dry run: {counts['dirs']} folders and {counts['files']} files would be written, "
+                     f"{counts['skipped']} leaves skipped, {counts['suffixed']} names suffixed, "
+                     f"{counts['promoted']} leaves promoted to folders"
+                     + (f", {counts['broken_links']} broken references" if 'broken_links' in counts else ""))
+        return
 
-        # Mapping from unique IDs to filesystem paths
-        id_to_path_map = {'root': base_dir}
+    if args.output_format != 'dir' and (args.incremental or args.prune or args.staged or args.watch):
+        parser.error(f"--output-format {args.output_format} cannot be combined with --incremental, --prune, "
+                     f"--staged or --watch")
 
-        # Select the sanitization function based on the argument
-        if use_alternative_sanitization:
-            sanitize_function = alternative_sanitize_and_clean_name
-        else:
-            sanitize_function = sanitize_and_clean_name
+    if args.watch:
+        if args.staged:
+            parser.error('--watch cannot be combined with --staged')
+        if args.jobs != 1 or args.cache_dir or args.metrics_json or args.profile:
+            parser.error('--watch cannot be combined with --jobs, --cache-dir, --metrics-json or --profile')
+        if sidebar or args.resolve_links:
+            parser.error('--watch cannot be combined with --categories, --sidebars or --resolve-links')
+        watch_outline(input_file, base_dir, sanitize_function, args.allow_empty_folders, args.id_scheme,
+                      interval=args.watch_interval)
+        return
+
+    # Memory tracing is expensive, so it only runs when metrics are written out
+    metrics = None
+    if args.metrics_json or args.profile:
+        metrics = RunMetrics(trace_memory=bool(args.metrics_json))
+    profiler = cProfile.Profile() if args.profile else None
 
-        # Create the folder structure and .md files using the selected sanitization function
-        create_structure(root, base_dir, id_to_path_map, sanitize_function, allow_empty_folders)
+    try:
+        logging.info("Starting processing...")
+        if metrics:
+            metrics.start()
+        if profiler:
+            profiler.enable()
+        try:
+            writer = None
+            if args.output_format != 'dir':
+                message = args.git_message or f"Generate docs from {os.path.basename(input_file)}"
+                writer = open_output_writer(args.output_format, base_dir, args.git_branch, args.git_prefix, message)
+            with writer or nullcontext():
+                summary = process_outline(input_file, base_dir, sanitize_function, args.allow_empty_folders,
+                                          jobs=max(1, args.jobs), id_scheme=args.id_scheme,
+                                          incremental=args.incremental, prune=args.prune, staged=args.staged,
+                                          metrics=metrics, cache=plan_cache_from_args(args), sidebar=sidebar,
+                                          resolve_links=args.resolve_links, writer=writer)
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(args.profile)
+            if metrics:
+                metrics.stop()
+                log_metrics(metrics)
+                if args.metrics_json:
+                    with open(args.metrics_json, 'w', encoding='utf-8') as f:
+                        json.dump(metrics.report(), f, indent=2)
+
+        if args.prune and not args.staged:
+            logging.info(f"Pruned {summary['pruned_files']} stale files and {summary['pruned_folders']} empty folders")
+        if args.staged:
+            note = " (unchanged files hard-linked from the previous generation)"
+        elif args.incremental:
+            note = " (unchanged files skipped)"
+        else:
+            note = ""
+        if 'added' in summary:
+            logging.info(f"Files: {summary['added']} added, {summary['changed']} changed, "
+                         f"{summary['unchanged']} unchanged, {summary['removed']} removed{note}")
+        else:
+            logging.info(f"Files: {summary['written']} written")
 
         logging.info("Processing completed successfully!")
 
@@ -269,4 +2668,4 @@ def main():
         logging.error(f"An error occurred during processing: {str(e)}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,17 @@
 import sys
 import os
+import json
+import time
+import signal
+import shutil
+import hashlib
 from pathlib import Path
 import webbrowser
 import subprocess
 import logging
 import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 
@@ -103,22 +110,392 @@ except Exception as e:
     print(f"Or set the correct path to git.exe in the script")
     sys.exit(1)
 
-def verify_node():
+# Resolved toolchain versions are cached here and probed again once they are older than the TTL
+TOOLCHAIN_CACHE_FILE = os.path.join(os.path.expanduser('~'), '.docgui', 'toolchain.json')
+TOOLCHAIN_CACHE_TTL = 24 * 60 * 60
+
+def probe_executable(name):
+    """
+    Resolves an executable on PATH and asks it for its version.
+
+    Returns:
+        dict: {'version': ..., 'path': ...}, or None if it is missing or fails.
+    """
+    path = shutil.which(name)
+    if path is None:
+        return None
     try:
-        result = subprocess.run('node --version', shell=True, capture_output=True, text=True)
-        return result.returncode == 0
-    except:
-        return False
+        result = subprocess.run(f'{name} --version', shell=True, capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        logging.debug(f"{name} --version failed: {result.stderr.strip()}")
+        return None
+    return {'version': result.stdout.strip(), 'path': path}
+
+def probe_global_package(package):
+    """
+    Looks up the version of a globally installed npm package without starting it.
+
+    Returns:
+        dict: {'version': ..., 'path': ...}, or None if it is not installed.
+    """
+    try:
+        result = subprocess.run('npm root -g', shell=True, capture_output=True, text=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    package_dir = os.path.join(result.stdout.strip(), package)
+    try:
+        with open(os.path.join(package_dir, 'package.json'), 'r', encoding='utf-8') as f:
+            version = json.load(f).get('version')
+    except (OSError, ValueError):
+        return None
+    return {'version': version, 'path': package_dir} if version else None
+
+class ToolchainCache:
+    """
+    Remembers the resolved node, npm, git and create-docusaurus versions and paths.
+
+    The cache is reused until it is older than the TTL or one of its paths no
+    longer exists. On a miss all tools are probed concurrently.
+    """
+    VERSION = 1
+    EXECUTABLES = ('node', 'npm', 'git')
+    PACKAGES = ('create-docusaurus',)
+
+    def __init__(self, cache_file=TOOLCHAIN_CACHE_FILE, ttl=TOOLCHAIN_CACHE_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        Returns the cached tools, or None if the cache is missing, expired or stale.
+        """
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != self.VERSION or time.time() - data.get('checked_at', 0) > self.ttl:
+            return None
+        tools = data.get('tools', {})
+        for name in self.EXECUTABLES + self.PACKAGES:
+            entry = tools.get(name)
+            if not entry or not os.path.exists(entry.get('path', '')):
+                return None
+        return tools
+
+    def save(self, tools):
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            temp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.VERSION, 'checked_at': time.time(), 'tools': tools}, f, indent=2)
+            os.replace(temp_file, self.cache_file)
+        except OSError as e:
+            logging.warning(f"Could not save the toolchain cache {self.cache_file}: {e}")
+
+    def probe(self):
+        """
+        Probes all tools concurrently. Missing tools map to None.
+        """
+        with ThreadPoolExecutor(max_workers=len(self.EXECUTABLES) + len(self.PACKAGES)) as executor:
+            futures = {name: executor.submit(probe_executable, name) for name in self.EXECUTABLES}
+            futures.update({name: executor.submit(probe_global_package, name) for name in self.PACKAGES})
+            return {name: future.result() for name, future in futures.items()}
+
+    def resolve(self, refresh=False):
+        """
+        Returns (tools, cached). With refresh, the cache is ignored and probed again.
+        """
+        with self.lock:
+            tools = None if refresh else self.load()
+            if tools is not None:
+                return tools, True
+            return self.probe(), False
+
+# Everything a Docusaurus build reads, relative to the project directory
+BUILD_INPUT_DIRS = ('docs', 'blog', 'src', 'static', 'i18n')
+BUILD_INPUT_FILES = ('docusaurus.config.js', 'docusaurus.config.ts', 'sidebars.js', 'sidebars.ts', 'package.json',
+                     'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml')
+
+def build_fingerprint(project_dir):
+    """
+    Hashes the relative path, size and content of every build input, in a fixed order.
+    """
+    paths = [name for name in BUILD_INPUT_FILES if os.path.isfile(os.path.join(project_dir, name))]
+    for directory in BUILD_INPUT_DIRS:
+        for current, dirs, files in os.walk(os.path.join(project_dir, directory)):
+            dirs.sort()
+            paths.extend(os.path.relpath(os.path.join(current, name), project_dir) for name in sorted(files))
+
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        full_path = os.path.join(project_dir, path)
+        digest.update(f"{path.replace(os.sep, '/')}\0{os.path.getsize(full_path)}\0".encode('utf-8'))
+        with open(full_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+class BuildCache:
+    """
+    Records the fingerprint of the last successful build of a project.
+
+    The record lives in node_modules/.cache, which is never committed or deployed.
+    """
+    def __init__(self, project_dir):
+        self.project_dir = project_dir
+        self.stamp_file = os.path.join(project_dir, 'node_modules', '.cache', 'docgui', 'build.json')
+
+    def is_current(self, fingerprint):
+        """
+        Returns True if build/ exists and was built from inputs with this fingerprint.
+        """
+        if not os.path.isfile(os.path.join(self.project_dir, 'build', 'index.html')):
+            return False
+        try:
+            with open(self.stamp_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get('fingerprint') == fingerprint
+        except (OSError, ValueError):
+            return False
 
-class ConsoleRedirector:
-    def __init__(self, text_widget, tag):
+    def record(self, fingerprint):
+        try:
+            os.makedirs(os.path.dirname(self.stamp_file), exist_ok=True)
+            with open(self.stamp_file, 'w', encoding='utf-8') as f:
+                json.dump({'fingerprint': fingerprint, 'built_at': time.time()}, f)
+        except OSError as e:
+            logging.warning(f"Could not record the build fingerprint in {self.stamp_file}: {e}")
+
+    def clear(self):
+        try:
+            os.remove(self.stamp_file)
+        except FileNotFoundError:
+            pass
+
+class ProcessRunner:
+    """
+    Runs commands and streams their stdout and stderr lines as they arrive.
+
+    Each pipe is read by its own thread, so a quiet pipe never blocks the other.
+    Lines are passed to output.write(text, tag), e.g. a BufferedConsole; the
+    runner itself never touches a widget.
+    """
+    def __init__(self, output):
+        self.output = output
+        self.processes = set()
+        self.lock = threading.Lock()
+
+    def _pump(self, pipe, tag, captured):
+        with pipe:
+            for line in pipe:
+                captured.append(line)
+                self.output.write(line, tag)
+
+    def run(self, command, cwd=None, env=None):
+        """
+        Runs a command to completion. A string command is run through the shell.
+
+        Returns:
+            subprocess.CompletedProcess: With the full stdout and stderr text, as with capture_output.
+        """
+        process = subprocess.Popen(
+            command,
+            shell=isinstance(command, str),
+            cwd=cwd,
+            env=env,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=1,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            # Own process group, so terminate() reaches the shell's children; unlike a new
+            # session this keeps the terminal, so ssh can still ask for a key passphrase.
+            # setpgrp rather than process_group=0, which needs Python 3.11
+            preexec_fn=None if os.name == 'nt' else os.setpgrp
+        )
+        with self.lock:
+            self.processes.add(process)
+        stdout, stderr = [], []
+        readers = [threading.Thread(target=self._pump, args=(process.stdout, "normal", stdout), daemon=True),
+                   threading.Thread(target=self._pump, args=(process.stderr, "error", stderr), daemon=True)]
+        for reader in readers:
+            reader.start()
+        try:
+            returncode = process.wait()
+            for reader in readers:
+                reader.join()
+        finally:
+            with self.lock:
+                self.processes.discard(process)
+        return subprocess.CompletedProcess(command, returncode, ''.join(stdout), ''.join(stderr))
+
+    def terminate(self):
+        """
+        Stops every running command along with its child processes.
+        """
+        with self.lock:
+            processes = list(self.processes)
+        for process in processes:
+            if process.poll() is not None:
+                continue
+            try:
+                if os.name == 'nt':
+                    subprocess.run(['taskkill', '/T', '/F', '/PID', str(process.pid)], capture_output=True)
+                else:
+                    os.killpg(process.pid, signal.SIGTERM)
+            except OSError as e:
+                logging.debug(f"Could not stop process {process.pid}: {e}")
+
+class StagePipeline:
+    """
+    Runs named stages on worker threads as soon as the stages they depend on have succeeded.
+
+    Stages must be added after their dependencies, so the graph cannot have cycles.
+    When a stage fails, no further stages start, on_cancel is called so running
+    stages can stop early, and the first error is raised once they have finished.
+    on_update(status, timings) is called from worker threads on every change.
+    """
+    def __init__(self, on_update=None, on_cancel=None, max_workers=4):
+        self.stages = {}  # name -> (func, dependencies), in the order they were added
+        self.status = {}  # name -> 'pending', 'running', 'done', 'failed' or 'cancelled'
+        self.timings = {}  # name -> seconds
+        self.on_update = on_update
+        self.on_cancel = on_cancel
+        self.max_workers = max_workers
+
+    def add(self, name, func, depends_on=()):
+        for dependency in depends_on:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage {name!r} depends on unknown stage {dependency!r}")
+        self.stages[name] = (func, tuple(depends_on))
+        self.status[name] = 'pending'
+
+    def _set_status(self, name, status):
+        self.status[name] = status
+        if self.on_update:
+            self.on_update(dict(self.status), dict(self.timings))
+
+    def run(self):
+        pending = dict(self.stages)
+        running = {}  # future -> (name, start time)
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                if error is None:
+                    for name, (func, dependencies) in list(pending.items()):
+                        if all(self.status[dependency] == 'done' for dependency in dependencies):
+                            del pending[name]
+                            self._set_status(name, 'running')
+                            running[executor.submit(func)] = (name, time.perf_counter())
+                else:
+                    for name in pending:
+                        self._set_status(name, 'cancelled')
+                    pending.clear()
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, started = running.pop(future)
+                    self.timings[name] = time.perf_counter() - started
+                    try:
+                        future.result()
+                    except Exception as e:
+                        # Stages that fail because of the cancellation are not the cause
+                        self._set_status(name, 'failed' if error is None else 'cancelled')
+                        if error is None:
+                            error = e
+                            if self.on_cancel:
+                                self.on_cancel()
+                    else:
+                        self._set_status(name, 'done')
+
+        if error is not None:
+            raise error
+
+    def summary(self):
+        return ', '.join(f"{name} {self.status[name]}" + (f" {self.timings[name]:.1f}s" if name in self.timings else "")
+                         for name in self.stages)
+
+class BufferedConsole:
+    """
+    Thread-safe, rate-limited output sink for a Tk text widget.
+
+    write() may be called from any thread and only appends to a buffer. The Tk
+    thread flushes the buffer every FLUSH_MS, with one insert per run of equally
+    tagged writes. Both the buffer and the widget keep at most max_lines lines,
+    counted by newlines; older output is dropped and the drop is noted in the console.
+    """
+    FLUSH_MS = 40  # About 25 frames per second
+
+    def __init__(self, root, text_widget, max_lines=10000):
+        self.root = root
         self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.pending = deque()  # (text, tag, newline count) writes, oldest first
+        self.pending_lines = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+        self.root.after(self.FLUSH_MS, self._flush)
+
+    def write(self, text, tag="normal"):
+        if not text:
+            return
+        lines = text.count('\n')
+        with self.lock:
+            self.pending.append((text, tag, lines))
+            self.pending_lines += lines
+            # The newest write is always kept, even if it alone is longer than max_lines
+            while self.pending_lines > self.max_lines and len(self.pending) > 1:
+                _, _, old_lines = self.pending.popleft()
+                self.pending_lines -= old_lines
+                self.dropped += old_lines
+
+    def _flush(self):
+        with self.lock:
+            writes = list(self.pending)
+            self.pending.clear()
+            self.pending_lines = 0
+            dropped, self.dropped = self.dropped, 0
+
+        if dropped:
+            self.text_widget.insert(tk.END, f"... {dropped} lines dropped while the console was busy ...\n", "error")
+        if writes:
+            # Coalesce consecutive writes with the same tag into one insert
+            run_tag, run = writes[0][1], []
+            for text, tag, _ in writes:
+                if tag != run_tag:
+                    self.text_widget.insert(tk.END, ''.join(run), run_tag)
+                    run_tag, run = tag, []
+                run.append(text)
+            self.text_widget.insert(tk.END, ''.join(run), run_tag)
+
+            excess = int(self.text_widget.index('end-1c').split('.')[0]) - self.max_lines
+            if excess > 0:
+                self.text_widget.delete('1.0', f'{excess + 1}.0')
+            self.text_widget.see(tk.END)
+
+        self.root.after(self.FLUSH_MS, self._flush)
+
+class ConsoleRedirector:
+    """
+    File-like adapter that sends sys.stdout or sys.stderr writes to a BufferedConsole.
+    """
+    def __init__(self, console, tag):
+        self.console = console
         self.tag = tag
 
     def write(self, text):
-        self.text_widget.insert(tk.END, text, self.tag)
-        self.text_widget.see(tk.END)
-        self.text_widget.update()
+        self.console.write(text, self.tag)
 
     def flush(self):
         pass
@@ -154,6 +531,10 @@ class DocusaurusDeployGUI:
         self.branch_entry.insert(0, "main")
         self.branch_entry.pack()
 
+        # Rebuild even when the sources match the last successful build
+        self.force_build = tk.BooleanVar(value=False)
+        tk.Checkbutton(root, text="Force full build", variable=self.force_build).pack(pady=5)
+
         # Remove GitHub Username field
 
         # Buttons frame
@@ -162,11 +543,16 @@ class DocusaurusDeployGUI:
         
         tk.Button(self.buttons_frame, text="Initialize Site", command=self.initialize_site).pack(side=tk.LEFT, padx=5)
         tk.Button(self.buttons_frame, text="Deploy to GitHub Pages", command=self.deploy).pack(side=tk.LEFT, padx=5)
+        tk.Button(self.buttons_frame, text="Refresh Toolchain", command=self.refresh_toolchain).pack(side=tk.LEFT, padx=5)
 
         # Status
         self.status_label = tk.Label(root, text="")
         self.status_label.pack(pady=10)
 
+        # Status and timing of each deploy stage
+        self.stage_label = tk.Label(root, text="")
+        self.stage_label.pack()
+
         # Add console output
         tk.Label(root, text="Console Output:").pack(pady=5)
         self.console = scrolledtext.ScrolledText(root, height=10)
@@ -176,11 +562,16 @@ class DocusaurusDeployGUI:
         self.console.tag_configure("error", foreground="red")
         self.console.tag_configure("normal", foreground="black")
         
+        # All console output goes through one buffered sink, flushed on the Tk thread
+        self.output = BufferedConsole(root, self.console)
+
         # Redirect stdout and stderr
-        sys.stdout = ConsoleRedirector(self.console, "normal")
-        sys.stderr = ConsoleRedirector(self.console, "error")
+        sys.stdout = ConsoleRedirector(self.output, "normal")
+        sys.stderr = ConsoleRedirector(self.output, "error")
         
         self.is_busy = False
+        self.toolchain = ToolchainCache()
+        self.runner = ProcessRunner(self.output)
 
     def browse_directory(self):
         directory = filedialog.askdirectory()
@@ -188,45 +579,48 @@ class DocusaurusDeployGUI:
             self.dir_entry.delete(0, tk.END)
             self.dir_entry.insert(0, directory)
 
-    def verify_environment(self):
-        if not verify_node():
-            self.console.insert(tk.END, "Node.js is not installed. Please install Node.js from https://nodejs.org\n", "error")
-            webbrowser.open('https://nodejs.org')
-            return False
-            
+    def verify_environment(self, refresh=False):
         try:
-            # Pre-install required npm packages globally
-            self.console.insert(tk.END, "Checking/installing required npm packages...\n", "normal")
-            subprocess.run('npm install -g create-docusaurus@latest', 
-                         shell=True, 
-                         check=True,
-                         capture_output=True)
-            
-            # Rest of environment checks
-            npm_check = subprocess.run('npm --version', 
-                                    shell=True, 
-                                    capture_output=True, 
-                                    text=True)
-            git_check = subprocess.run('git --version', 
-                                     shell=True, 
-                                     capture_output=True, 
-                                     text=True)
-            
-            if npm_check.returncode != 0:
-                self.console.insert(tk.END, f"npm check failed: {npm_check.stderr}\n", "error")
+            tools, cached = self.toolchain.resolve(refresh)
+
+            if tools['node'] is None:
+                self.output.write("Node.js is not installed. Please install Node.js from https://nodejs.org\n", "error")
+                webbrowser.open('https://nodejs.org')
                 return False
-            if git_check.returncode != 0:
-                self.console.insert(tk.END, f"git check failed: {git_check.stderr}\n", "error")
+            if tools['npm'] is None:
+                self.output.write("npm check failed: npm was not found or did not run\n", "error")
                 return False
-                
-            self.console.insert(tk.END, f"npm version: {npm_check.stdout}", "normal")
-            self.console.insert(tk.END, f"git version: {git_check.stdout}", "normal")
+            if tools['git'] is None:
+                self.output.write("git check failed: git was not found or did not run\n", "error")
+                return False
+
+            # Install create-docusaurus only when it is missing or a refresh was asked for
+            if tools['create-docusaurus'] is None or refresh:
+                self.output.write("Installing create-docusaurus globally...\n", "normal")
+                subprocess.run('npm install -g create-docusaurus@latest',
+                             shell=True,
+                             check=True,
+                             capture_output=True)
+                tools['create-docusaurus'] = probe_global_package('create-docusaurus')
+                if tools['create-docusaurus'] is None:
+                    self.output.write("create-docusaurus was installed but could not be found\n", "error")
+                    return False
+
+            if not cached:
+                self.toolchain.save(tools)
+
+            source = "cached" if cached else "probed"
+            for name in ('node', 'npm', 'git', 'create-docusaurus'):
+                self.output.write(f"{name} version ({source}): {tools[name]['version']}\n", "normal")
             return True
             
         except Exception as e:
-            self.console.insert(tk.END, f"Environment check error: {str(e)}\n", "error")
+            self.output.write(f"Environment check error: {str(e)}\n", "error")
             return False
 
+    def refresh_toolchain(self):
+        self.run_async(lambda: self.verify_environment(refresh=True))
+
     def run_async(self, func):
         if self.is_busy:
             messagebox.showwarning("Busy", "An operation is already in progress")
@@ -263,39 +657,13 @@ class DocusaurusDeployGUI:
                 raise ValueError("Directory and site name are required!")
 
             self.status_label.config(text="Creating Docusaurus site...")
-            self.console.insert(tk.END, "Starting site creation...\n", "normal")
+            self.output.write("Starting site creation...\n", "normal")
             
             # Create Docusaurus project with live output using npx without prompts
             create_command = 'npx --yes create-docusaurus@latest'
             args = [site_name, 'classic', '--typescript']
             
-            process = subprocess.Popen(
-                f'{create_command} {" ".join(args)}',
-                shell=True,
-                cwd=project_dir,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                bufsize=1,
-                universal_newlines=True
-            )
-
-            # Monitor process output in real-time
-            while True:
-                output = process.stdout.readline()
-                if output:
-                    self.console.insert(tk.END, output, "normal")
-                    self.console.see(tk.END)
-                    self.console.update()
-                    
-                error = process.stderr.readline()
-                if error:
-                    self.console.insert(tk.END, error, "error")
-                    self.console.see(tk.END)
-                    self.console.update()
-                
-                # Check if process has finished
-                if process.poll() is not None:
-                    break
+            process = self.runner.run(f'{create_command} {" ".join(args)}', cwd=project_dir)
                     
             if process.returncode != 0:
                 raise ValueError("Failed to create Docusaurus site")
@@ -305,7 +673,7 @@ class DocusaurusDeployGUI:
             if not os.path.exists(full_project_path):
                 raise ValueError(f"Site directory was not created at {full_project_path}")
             
-            self.console.insert(tk.END, "Site directory created successfully.\n", "normal")
+            self.output.write("Site directory created successfully.\n", "normal")
             
             # Update directory to the new project folder
             self.dir_entry.delete(0, tk.END)
@@ -313,11 +681,7 @@ class DocusaurusDeployGUI:
 
             # Install dependencies
             self.status_label.config(text="Installing dependencies...")
-            install_result = subprocess.run('npm install',
-                                         shell=True,
-                                         cwd=full_project_path,
-                                         capture_output=True,
-                                         text=True)
+            install_result = self.runner.run('npm install', cwd=full_project_path)
             
             if install_result.returncode != 0:
                 raise ValueError("Failed to install dependencies")
@@ -327,7 +691,7 @@ class DocusaurusDeployGUI:
 
         except Exception as e:
             error_msg = f"Error: {str(e)}"
-            self.console.insert(tk.END, f"Initialization error: {str(e)}\n", "error")
+            self.output.write(f"Initialization error: {str(e)}\n", "error")
             self.status_label.config(text=error_msg)
             messagebox.showerror("Error", error_msg)
 
@@ -343,7 +707,7 @@ class DocusaurusDeployGUI:
             if not os.path.exists(project_dir):
                 error_msg = f"Project directory does not exist: {project_dir}"
                 logging.error(error_msg)
-                self.console.insert(tk.END, f"{error_msg}\n", "error")
+                self.output.write(f"{error_msg}\n", "error")
                 return
 
             # Verify Docusaurus project
@@ -359,7 +723,7 @@ class DocusaurusDeployGUI:
                 error_msg = (f"Invalid Docusaurus project directory! Cannot find "
                              f"'docusaurus.config.js' or 'docusaurus.config.ts' in {project_dir}")
                 logging.error(error_msg)
-                self.console.insert(tk.END, f"{error_msg}\n", "error")
+                self.output.write(f"{error_msg}\n", "error")
                 if messagebox.askyesno("Site Not Initialized",
                                        "Docusaurus site not found. Do you want to initialize it first?"):
                     self.initialize_site()
@@ -375,34 +739,16 @@ class DocusaurusDeployGUI:
             if not repo_url:
                 error_msg = "GitHub Repository URL cannot be empty."
                 logging.error(error_msg)
-                self.console.insert(tk.END, f"{error_msg}\n", "error")
+                self.output.write(f"{error_msg}\n", "error")
                 messagebox.showerror("Invalid Repository URL", error_msg)
                 return
             if repo_url == "git@github.com:facebook/docusaurus.git":
                 error_msg = "Please update the GitHub Repository URL to your own repository."
                 logging.error(error_msg)
-                self.console.insert(tk.END, f"{error_msg}\n", "error")
+                self.output.write(f"{error_msg}\n", "error")
                 messagebox.showerror("Invalid Repository URL", error_msg)
                 return
 
-            # Ensure .ssh directory exists and add GitHub to known_hosts
-            ssh_dir = os.path.join(os.environ.get('USERPROFILE', ''), '.ssh')
-            os.makedirs(ssh_dir, exist_ok=True)
-
-            ssh_scan_result = subprocess.run(
-                ['ssh-keyscan', 'github.com'],
-                capture_output=True,
-                text=True,
-                env=env
-            )
-            if ssh_scan_result.returncode == 0:
-                known_hosts_path = os.path.join(ssh_dir, 'known_hosts')
-                with open(known_hosts_path, 'a') as f:
-                    f.write(ssh_scan_result.stdout)
-            else:
-                self.console.insert(tk.END, f"Error running ssh-keyscan: {ssh_scan_result.stderr}\n", "error")
-                logging.error(f"ssh-keyscan failed: {ssh_scan_result.stderr}")
-
             logging.info(f"Starting deployment from {project_dir}")
             logging.info(f"Repository URL: {repo_url}")
             logging.info(f"Branch: {branch}")
@@ -422,114 +768,120 @@ class DocusaurusDeployGUI:
             if not config_found:
                 error_msg = f"Invalid Docusaurus project directory! Cannot find 'docusaurus.config.js' or 'docusaurus.config.ts' in {project_dir}"
                 logging.error(error_msg)
-                self.console.insert(tk.END, f"{error_msg}\n", "error")
+                self.output.write(f"{error_msg}\n", "error")
                 raise ValueError(error_msg)
 
-            # Initialize git if needed
-            if not os.path.exists(os.path.join(project_dir, '.git')):
-                logging.info("Initializing new git repository...")
-                repo = git.Repo.init(project_dir, initial_branch=branch)
-                # Create an initial commit to avoid empty branch issues
-                repo.git.add(all=True)
-                repo.index.commit('Initial commit')
-            else:
-                logging.info("Using existing git repository...")
-                repo = git.Repo(project_dir)
-                # Check if the branch exists
-                if branch in repo.heads:
-                    repo.git.checkout(branch)
-                else:
-                    # Create and switch to the new branch
-                    repo.git.checkout('-b', branch)
-
-            # Build the project
-            self.status_label.config(text="Building project...")
-            logging.info("Running npm run build...")
-            result = subprocess.run('npm run build', 
-                                 shell=True,
-                                 cwd=project_dir, 
-                                 capture_output=True,
-                                 text=True)
-            
-            self.console.insert(tk.END, result.stdout, "normal")
-            if result.stderr:
-                self.console.insert(tk.END, result.stderr, "error")
-
-            if result.returncode != 0:
-                raise ValueError(f"Build failed:\n{result.stderr}")
-            
-            # Configure git
-            if 'origin' not in [remote.name for remote in repo.remotes]:
-                logging.info("Adding remote origin...")
-                repo.create_remote('origin', repo_url)
-
-            # Add and commit changes
-            logging.info("Committing changes...")
-            repo.git.add(all=True)
-            try:
-                repo.git.commit('-m', 'Deploy to GitHub Pages')
-            except git.exc.GitCommandError as e:
-                if 'nothing to commit' in str(e):
-                    logging.info("No changes to commit")
+            repo = None
+
+            # Stages of the deploy. The build runs concurrently with known_hosts preparation
+            # and with committing and pushing the sources; the site is deployed once all are done.
+            def prepare_known_hosts():
+                # Add GitHub to known_hosts to prevent Host key verification failure
+                ssh_dir = os.path.join(os.environ.get('USERPROFILE', ''), '.ssh')
+                os.makedirs(ssh_dir, exist_ok=True)
+
+                ssh_scan_result = subprocess.run(
+                    ['ssh-keyscan', 'github.com'],
+                    capture_output=True,
+                    text=True,
+                    env=env
+                )
+                if ssh_scan_result.returncode == 0:
+                    known_hosts_path = os.path.join(ssh_dir, 'known_hosts')
+                    with open(known_hosts_path, 'a') as f:
+                        f.write(ssh_scan_result.stdout)
                 else:
-                    raise
-
-            # Push to GitHub
-            self.status_label.config(text="Pushing to GitHub...")
-            logging.info("Pushing to GitHub...")
-            push_result = subprocess.run(
-                ['git', 'push', '--set-upstream', 'origin', branch],
-                capture_output=True,
-                text=True,
-                cwd=project_dir,
-                env=env
-            )
-
-            if push_result.returncode != 0:
-                if 'Permission denied (publickey)' in push_result.stderr:
-                    self.console.insert(tk.END, "SSH Authentication failed. Please ensure your SSH keys are properly set up and added to GitHub.\n", "error")
-                    logging.error("SSH Authentication failed. Please ensure your SSH keys are properly set up and added to GitHub.")
+                    self.output.write(f"Error running ssh-keyscan: {ssh_scan_result.stderr}\n", "error")
+                    logging.error(f"ssh-keyscan failed: {ssh_scan_result.stderr}")
+
+            def checkout():
+                nonlocal repo
+                # Initialize git if needed
+                if not os.path.exists(os.path.join(project_dir, '.git')):
+                    logging.info("Initializing new git repository...")
+                    repo = git.Repo.init(project_dir, initial_branch=branch)
+                    # Create an initial commit to avoid empty branch issues
+                    repo.git.add(all=True)
+                    repo.index.commit('Initial commit')
                 else:
-                    self.console.insert(tk.END, f"Git push failed: {push_result.stderr}\n", "error")
-                    logging.error(f"Git push failed: {push_result.stderr}")
-                raise ValueError(f"Git push failed:\n{push_result.stderr}")
-
-            # Ensure .ssh directory exists
-            ssh_dir = os.path.join(os.environ.get('USERPROFILE', ''), '.ssh')
-            os.makedirs(ssh_dir, exist_ok=True)
-
-            # Add GitHub to known_hosts to prevent Host key verification failure
-            ssh_scan_result = subprocess.run(
-                ['ssh-keyscan', 'github.com'],
-                capture_output=True,
-                text=True,
-                env=env
-            )
-            if ssh_scan_result.returncode == 0:
-                known_hosts_path = os.path.join(ssh_dir, 'known_hosts')
-                with open(known_hosts_path, 'a') as f:
-                    f.write(ssh_scan_result.stdout)
-            else:
-                self.console.insert(tk.END, f"Error running ssh-keyscan: {ssh_scan_result.stderr}\n", "error")
-                logging.error(f"ssh-keyscan failed: {ssh_scan_result.stderr}")
-
-            # Deploy to GitHub Pages - let SSH handle authentication
-            logging.info("Running npm run deploy...")
-            deploy_result = subprocess.run(
-                'npm run deploy',
-                shell=True,
-                cwd=project_dir,
-                capture_output=True,
-                text=True,
-                env=env
-            )
-
-            self.console.insert(tk.END, deploy_result.stdout, "normal")
-            if deploy_result.stderr:
-                self.console.insert(tk.END, deploy_result.stderr, "error")
-
-            if deploy_result.returncode != 0:
-                raise ValueError(f"Deploy failed:\n{deploy_result.stderr}")
+                    logging.info("Using existing git repository...")
+                    repo = git.Repo(project_dir)
+                    # Check if the branch exists
+                    if branch in repo.heads:
+                        repo.git.checkout(branch)
+                    else:
+                        # Create and switch to the new branch
+                        repo.git.checkout('-b', branch)
+
+            def build():
+                # Build the project, unless build/ is already built from the same sources
+                build_cache = BuildCache(project_dir)
+                fingerprint = build_fingerprint(project_dir)
+                if not force_build and build_cache.is_current(fingerprint):
+                    logging.info("Sources unchanged since the last successful build, reusing build/")
+                    return
+                build_cache.clear()
+                logging.info("Running npm run build...")
+                result = self.runner.run('npm run build', cwd=project_dir)
+
+                if result.returncode != 0:
+                    raise ValueError(f"Build failed:\n{result.stderr}")
+                build_cache.record(fingerprint)
+
+            def commit():
+                # Configure git
+                if 'origin' not in [remote.name for remote in repo.remotes]:
+                    logging.info("Adding remote origin...")
+                    repo.create_remote('origin', repo_url)
+
+                # Add and commit changes. The build runs concurrently and writes into the same
+                # work tree, so its outputs are excluded even where .gitignore does not list them
+                logging.info("Committing changes...")
+                repo.git.add('--all', '--', '.', ':(exclude)build', ':(exclude).docusaurus')
+                try:
+                    repo.git.commit('-m', 'Deploy to GitHub Pages')
+                except git.exc.GitCommandError as e:
+                    if 'nothing to commit' in str(e):
+                        logging.info("No changes to commit")
+                    else:
+                        raise
+
+            def push():
+                # Push to GitHub
+                logging.info("Pushing to GitHub...")
+                push_result = self.runner.run(['git', 'push', '--set-upstream', 'origin', branch], cwd=project_dir, env=env)
+
+                if push_result.returncode != 0:
+                    if 'Permission denied (publickey)' in push_result.stderr:
+                        self.output.write("SSH Authentication failed. Please ensure your SSH keys are properly set up and added to GitHub.\n", "error")
+                        logging.error("SSH Authentication failed. Please ensure your SSH keys are properly set up and added to GitHub.")
+                    else:
+                        self.output.write(f"Git push failed: {push_result.stderr}\n", "error")
+                        logging.error(f"Git push failed: {push_result.stderr}")
+                    raise ValueError(f"Git push failed:\n{push_result.stderr}")
+
+            def deploy():
+                # Deploy to GitHub Pages - let SSH handle authentication. build/ is current at this point
+                logging.info("Running npm run deploy...")
+                deploy_result = self.runner.run('npm run deploy -- --skip-build', cwd=project_dir, env=env)
+
+                if deploy_result.returncode != 0:
+                    raise ValueError(f"Deploy failed:\n{deploy_result.stderr}")
+
+            force_build = self.force_build.get()
+            pipeline = StagePipeline(on_update=self._show_stages, on_cancel=self.runner.terminate)
+            pipeline.add('known_hosts', prepare_known_hosts)
+            pipeline.add('checkout', checkout)
+            pipeline.add('build', build, depends_on=('checkout',))
+            pipeline.add('commit', commit, depends_on=('checkout',))
+            pipeline.add('push', push, depends_on=('commit', 'known_hosts'))
+            pipeline.add('deploy', deploy, depends_on=('build', 'push'))
+
+            self.status_label.config(text="Deploying...")
+            try:
+                pipeline.run()
+            finally:
+                logging.info(f"Deploy stages: {pipeline.summary()}")
 
             self.status_label.config(text="Deployment successful!")
             messagebox.showinfo("Success", "Deployed to GitHub Pages successfully!")
@@ -537,14 +889,18 @@ class DocusaurusDeployGUI:
         except Exception as e:
             error_msg = f"Error: {str(e)}"
             logging.error(error_msg)
-            self.console.insert(tk.END, f"Deployment error: {str(e)}\n", "error")
+            self.output.write(f"Deployment error: {str(e)}\n", "error")
             self.status_label.config(text=error_msg)
             messagebox.showerror("Error", error_msg)
             raise  # Re-raise to see full traceback in console
 
+    def _show_stages(self, status, timings):
+        text = '   '.join(f"{name}: {state}" + (f" ({timings[name]:.1f}s)" if name in timings else "")
+                           for name, state in status.items())
+        self.root.after(0, lambda: self.stage_label.config(text=text))
+
     def update_console(self, text, tag="normal"):
-        self.root.after(0, lambda: self.console.insert(tk.END, text, tag))
-        self.root.after(0, lambda: self.console.see(tk.END))
+        self.output.write(text, tag)
 
 if __name__ == "__main__":
     root = tk.Tk()